@@ -1,33 +1,68 @@
 """Chat API routes."""
 import time
 from datetime import datetime
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from app.controllers.chat_controller import ChatController, get_chat_controller
 from app.models.chat import ChatRequest, ChatResponse
-from app.core.dependencies import get_llm_service, get_tool_manager
+from app.core.admission import get_admission_controller
+from app.core.dependencies import get_llm_service, get_tool_manager, verify_admin_key
 
 router = APIRouter(prefix="/api/v1", tags=["chat"])
 
 
 @router.post("/chat", response_model=ChatResponse)
-def process_chat_message(
+async def process_chat_message(
     request: ChatRequest,
     controller: ChatController = Depends(get_chat_controller)
 ):
     """Process a chat message."""
-    return controller.process_chat_message(request)
+    return await controller.process_chat_message(request)
+
+
+@router.post("/chat/stream")
+async def stream_chat_message(
+    request: ChatRequest,
+    controller: ChatController = Depends(get_chat_controller)
+):
+    """Stream a chat answer as Server-Sent Events (token, tool_start, tool_end, done, error)."""
+    return StreamingResponse(
+        controller.stream_chat_message(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/tools")
-def get_tools(tool_manager=Depends(get_tool_manager)):
+async def get_tools(tool_manager=Depends(get_tool_manager)):
     """Get all available tools with their schemas."""
     return {
         "tools": tool_manager.get_all_tools()
     }
 
 
+@router.get("/stats")
+async def get_stats(llm_service=Depends(get_llm_service)):
+    """Get runtime gauges (conversation memory, agent pool, caches, admission control)."""
+    return {**await llm_service.aget_stats(), "admission": get_admission_controller().get_stats()}
+
+
+@router.post("/admin/reload-knowledge", dependencies=[Depends(verify_admin_key)])
+async def reload_knowledge(force: bool = False, llm_service=Depends(get_llm_service)):
+    """Rebuild the knowledge base index in the background and swap it in.
+
+    Only the worker process that handles this request is reloaded; the response
+    names it by ``pid`` and its knowledge ``generation``. With several workers,
+    set ``KNOWLEDGE_RELOAD_INTERVAL_SECONDS`` so every worker picks up the change.
+    """
+    try:
+        return await llm_service.knowledge_reloader.reload(force=force)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Knowledge base reload failed: {e}")
+
+
 class SandboxToolRequest(BaseModel):
     """Request model for sandbox tool execution."""
     tool_name: str = Field(..., description="Name of the tool to execute")
@@ -35,7 +70,7 @@ class SandboxToolRequest(BaseModel):
 
 
 @router.post("/sandbox/execute")
-def execute_tool_in_sandbox(
+async def execute_tool_in_sandbox(
     request: SandboxToolRequest,
     tool_manager=Depends(get_tool_manager)
 ):
@@ -44,9 +79,9 @@ def execute_tool_in_sandbox(
     args = request.args
     
     tool_impl_map = {
-        "retriever_tool": tool_manager._retriever_impl,
+        "retriever_tool": tool_manager._aretriever_impl,
         "get_current_datetime": lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "web_search_tool": tool_manager._web_search_impl,
+        "web_search_tool": tool_manager._aweb_search_impl,
     }
     
     if tool_name not in tool_impl_map:
@@ -65,7 +100,10 @@ def execute_tool_in_sandbox(
             result = tool_func()
         else:
             query = args.get("query", "")
-            result = tool_func(query)
+            if tool_name == "retriever_tool":
+                result = await tool_func(query, category=args.get("category"))
+            else:
+                result = await tool_func(query)
         
         execution_time_ms = (time.time() - start_time) * 1000
         
@@ -1,16 +1,23 @@
 """Chat controller for handling chat requests."""
+import json
 import logging
-from typing import Optional, Any
+import math
+from typing import Optional, Any, AsyncIterator
 
 from fastapi import HTTPException, Depends
 
+from app.core.admission import get_admission_controller
+from app.core.constants import OVERLOADED_DETAIL, UPSTREAM_RETRY_AFTER_SECONDS
 from app.core.dependencies import get_llm_service
-from app.core.exceptions import ValidationError, LLMServiceError
+from app.core.tracing import start_trace
+from app.core.exceptions import ValidationError, LLMServiceError, ContextLengthError, UpstreamRateLimitError
 from app.models.chat import ChatRequest, ChatResponse, ToolCall
 from app.services.llm_service import LLMService
 
 logger = logging.getLogger(__name__)
 
+CONTEXT_TOO_LONG_DETAIL = "Die Konversation ist zu lang geworden. Bitte starte einen neuen Chat-Tab, um fortzufahren."
+
 
 class ChatController:
     """Controller for chat-related operations."""
@@ -18,34 +25,97 @@ class ChatController:
     def __init__(self, llm_service: LLMService):
         self.llm_service = llm_service
     
-    def process_chat_message(self, request: ChatRequest) -> ChatResponse:
+    async def process_chat_message(self, request: ChatRequest) -> ChatResponse:
         """Process a chat message request."""
+        with start_trace("chat", thread_id=request.thread_id, model=request.model, debug_mode=request.debug_mode) as span:
+            try:
+                message = self._validate_message(request.message)
+                answer, used_thread_id, tool_calls, debug_info = await self.llm_service.ainvoke(
+                    message, 
+                    thread_id=request.thread_id,
+                    debug_mode=request.debug_mode,
+                    model=request.model
+                )
+                
+                if span is not None:
+                    span.set_attribute("thread_id", used_thread_id)
+                tool_call_models = self._convert_tool_calls(tool_calls)
+                
+                return ChatResponse(
+                    answer=answer,
+                    status="success",
+                    thread_id=used_thread_id,
+                    tool_calls=tool_call_models,
+                    debug_info=debug_info
+                )
+            except ValidationError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            except ContextLengthError as e:
+                logger.warning(f"Context length exceeded: {e}")
+                raise HTTPException(status_code=409, detail=CONTEXT_TOO_LONG_DETAIL)
+            except UpstreamRateLimitError as e:
+                retry_after = self._upstream_retry_after(e)
+                raise HTTPException(status_code=503, detail=OVERLOADED_DETAIL, headers={"Retry-After": str(retry_after)})
+            except LLMServiceError as e:
+                logger.error(f"LLM service error: {e}")
+                raise HTTPException(status_code=500, detail="Error processing your message")
+            except Exception as e:
+                logger.error(f"Unexpected error: {e}", exc_info=True)
+                raise HTTPException(status_code=500, detail="Internal server error")
+    
+    def stream_chat_message(self, request: ChatRequest) -> AsyncIterator[str]:
+        """Validate a chat request and return its answer as a Server-Sent Events stream."""
         try:
             message = self._validate_message(request.message)
-            answer, used_thread_id, tool_calls, debug_info = self.llm_service.invoke(
-                message, 
-                thread_id=request.thread_id,
-                debug_mode=request.debug_mode,
-                model=request.model
-            )
-            
-            tool_call_models = self._convert_tool_calls(tool_calls)
-            
-            return ChatResponse(
-                answer=answer,
-                status="success",
-                thread_id=used_thread_id,
-                tool_calls=tool_call_models,
-                debug_info=debug_info
-            )
         except ValidationError as e:
             raise HTTPException(status_code=400, detail=str(e))
-        except LLMServiceError as e:
-            logger.error(f"LLM service error: {e}")
-            raise HTTPException(status_code=500, detail="Error processing your message")
-        except Exception as e:
-            logger.error(f"Unexpected error: {e}", exc_info=True)
-            raise HTTPException(status_code=500, detail="Internal server error")
+        
+        return self._stream_events(message, request)
+    
+    async def _stream_events(self, message: str, request: ChatRequest) -> AsyncIterator[str]:
+        """Format agent stream events as SSE frames."""
+        with start_trace("chat.stream", thread_id=request.thread_id, model=request.model, debug_mode=request.debug_mode) as span:
+            try:
+                async for event, payload in self.llm_service.astream(
+                    message,
+                    thread_id=request.thread_id,
+                    debug_mode=request.debug_mode,
+                    model=request.model
+                ):
+                    if event == "done":
+                        if span is not None:
+                            span.set_attribute("thread_id", payload["thread_id"])
+                        tool_call_models = self._convert_tool_calls(payload["tool_calls"])
+                        payload["tool_calls"] = (
+                            [tc.model_dump() for tc in tool_call_models] if tool_call_models else None
+                        )
+                    yield self._format_sse(event, payload)
+            except ValidationError as e:
+                yield self._format_sse("error", {"detail": str(e)})
+            except ContextLengthError as e:
+                logger.warning(f"Context length exceeded: {e}")
+                yield self._format_sse("error", {"detail": CONTEXT_TOO_LONG_DETAIL, "status": 409})
+            except UpstreamRateLimitError as e:
+                retry_after = self._upstream_retry_after(e)
+                yield self._format_sse("error", {"detail": OVERLOADED_DETAIL, "status": 503, "retry_after": retry_after})
+            except LLMServiceError as e:
+                logger.error(f"LLM service error: {e}")
+                yield self._format_sse("error", {"detail": "Error processing your message"})
+            except Exception as e:
+                logger.error(f"Unexpected error: {e}", exc_info=True)
+                yield self._format_sse("error", {"detail": "Internal server error"})
+    
+    @staticmethod
+    def _upstream_retry_after(e: UpstreamRateLimitError) -> int:
+        """Log an upstream rate limit and get the seconds the client should back off."""
+        logger.warning(f"Upstream rate limit: {e}")
+        get_admission_controller().record_upstream_rate_limit()
+        return max(1, math.ceil(e.retry_after)) if e.retry_after else UPSTREAM_RETRY_AFTER_SECONDS
+    
+    @staticmethod
+    def _format_sse(event: str, data: dict) -> str:
+        """Format a single Server-Sent Events frame."""
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
     
     @staticmethod
     def _convert_tool_calls(tool_calls: Optional[list[dict[str, Any]]]) -> Optional[list[ToolCall]]:
@@ -57,7 +127,8 @@ class ChatController:
                 name=tc["name"],
                 args=tc["args"],
                 mcp=tc.get("mcp", False),
-                tool_schema=tc.get("tool_schema")
+                tool_schema=tc.get("tool_schema"),
+                cache_hit=tc.get("cache_hit")
             )
             for tc in tool_calls
         ]
@@ -0,0 +1,205 @@
+"""Admission control for the chat endpoints.
+
+Each request first takes a token from its client IP bucket and, when it
+continues a conversation, from its thread bucket. It then needs one of
+``ADMISSION_MAX_IN_FLIGHT`` slots and may wait for one in a bounded FIFO
+queue for up to ``ADMISSION_QUEUE_TIMEOUT_SECONDS``. Everything else is
+turned away at once with a ``Retry-After`` hint, so a burst cannot push the
+latency of admitted requests up. Limits apply per worker process.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Optional
+
+from app.core.cache import LRUCache
+from app.core.exceptions import AdmissionRejectedError
+from app.core.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_QUEUE_WAIT, ADMISSION_REJECTIONS
+from app.core.settings import Settings, get_settings
+
+# Weight of the latest request in the moving average of slot hold times.
+HOLD_TIME_SMOOTHING = 0.2
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateLimiter:
+    """Token buckets per client key, refilled at ``rate_per_minute`` up to ``burst`` tokens."""
+
+    def __init__(self, rate_per_minute: float, burst: int, max_clients: int = 10000):
+        self.rate = rate_per_minute / 60
+        self.burst = max(1, burst)
+        self._buckets: LRUCache[_Bucket] = LRUCache(max_size=max_clients)
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def acquire(self, key: str) -> float:
+        """Take a token for ``key``; returns 0 if granted, else the seconds until the next token."""
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            # Evicted clients start over with a full bucket.
+            bucket = _Bucket(float(self.burst), now)
+            self._buckets.set(key, bucket)
+        bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+        bucket.updated = now
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0.0
+        return (1 - bucket.tokens) / self.rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class AdmissionController:
+    """Global in-flight cap with a bounded wait queue, behind per-IP and per-thread rate limits.
+
+    Runs on the event loop only, so the counters need no lock.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout: float,
+        ip_limiter: Optional[RateLimiter] = None,
+        thread_limiter: Optional[RateLimiter] = None
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.ip_limiter = ip_limiter
+        self.thread_limiter = thread_limiter
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected: dict[str, int] = {}
+        self._waiters: deque[asyncio.Future] = deque()
+        self._hold_seconds = 1.0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "AdmissionController":
+        return cls(
+            max_in_flight=settings.admission_max_in_flight,
+            max_queue=settings.admission_max_queue,
+            queue_timeout=settings.admission_queue_timeout_seconds,
+            ip_limiter=RateLimiter(
+                settings.admission_ip_rate_per_minute, settings.admission_ip_burst, settings.admission_max_tracked_clients
+            ),
+            thread_limiter=RateLimiter(
+                settings.admission_thread_rate_per_minute, settings.admission_thread_burst, settings.admission_max_tracked_clients
+            )
+        )
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _reject(self, reason: str, retry_after: float) -> AdmissionRejectedError:
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        ADMISSION_REJECTIONS.inc(reason=reason)
+        return AdmissionRejectedError(reason, max(1, math.ceil(retry_after)))
+
+    def _queue_retry_after(self) -> float:
+        """Estimate when the queue ahead of a new request will have drained."""
+        return self._hold_seconds * (self.queued + 1) / max(1, self.max_in_flight)
+
+    async def acquire(self, client: str, thread_id: Optional[str] = None):
+        """Admit a request or raise ``AdmissionRejectedError``; admitted requests must call ``release``."""
+        if self.ip_limiter is not None:
+            wait = self.ip_limiter.acquire(client)
+            if wait:
+                raise self._reject("ip_rate_limit", wait)
+        if thread_id and self.thread_limiter is not None:
+            wait = self.thread_limiter.acquire(thread_id)
+            if wait:
+                raise self._reject("thread_rate_limit", wait)
+
+        if self.max_in_flight <= 0:
+            return
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self._admit(0.0)
+            return
+        if self.queued >= self.max_queue:
+            raise self._reject("queue_full", self._queue_retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUE_DEPTH.set(self.queued)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # ``release`` may have handed over the slot in the same tick; pass it on.
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise self._reject("queue_timeout", self._queue_retry_after())
+        except asyncio.CancelledError:
+            # The client went away after the slot was handed over; pass it on.
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            ADMISSION_QUEUE_DEPTH.set(self.queued)
+        # ``release`` handed its slot to this waiter, so in_flight is unchanged.
+        self._admit(time.perf_counter() - start, handed_over=True)
+
+    def _admit(self, waited: float, handed_over: bool = False):
+        if not handed_over:
+            self.in_flight += 1
+            ADMISSION_IN_FLIGHT.set(self.in_flight)
+        self.admitted += 1
+        ADMISSION_QUEUE_WAIT.observe(waited)
+
+    def release(self, held_seconds: Optional[float] = None):
+        """Free a slot, handing it straight to the oldest waiter if there is one."""
+        if self.max_in_flight <= 0:
+            return
+        if held_seconds is not None:
+            self._hold_seconds += HOLD_TIME_SMOOTHING * (held_seconds - self._hold_seconds)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.set(self.in_flight)
+
+    def record_upstream_rate_limit(self):
+        """Count a request that reached Groq or Tavily and was rate limited there."""
+        self.rejected["upstream_rate_limit"] = self.rejected.get("upstream_rate_limit", 0) + 1
+        ADMISSION_REJECTIONS.inc(reason="upstream_rate_limit")
+
+    def get_stats(self) -> dict:
+        """Get slot usage, queue depth and rejection counters."""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "avg_hold_seconds": self._hold_seconds,
+            "tracked_ips": len(self.ip_limiter) if self.ip_limiter is not None else 0,
+            "tracked_threads": len(self.thread_limiter) if self.thread_limiter is not None else 0
+        }
+
+
+@lru_cache()
+def get_admission_controller() -> AdmissionController:
+    """Get the admission controller configured in the settings."""
+    return AdmissionController.from_settings(get_settings())
@@ -1,11 +1,37 @@
 INDEX_PATH = "portfolio-db"
 DATABASE_PATH = "data/portfolio-knowledge.json"
+INDEX_MANIFEST_FILE = "manifest.json"
+INDEX_FORMAT_VERSION = 3
+INDEX_FAISS_FILE = "index.faiss"
+INDEX_DOCSTORE_FILE = "docstore.json"
+FAQ_VECTORS_FILE = "faq-questions.npz"
+ROUTER_VECTORS_FILE = "router-questions.npz"
 
 DEFAULT_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
 DEFAULT_TEMPERATURE = 0.5
 RETRIEVAL_K = 4
-STREAM_DELAY = 0.01
 
 WEB_SEARCH_MAX_RESULTS = 5
 WEB_SEARCH_CONTENT_MAX_LENGTH = 500
 
+ADMISSION_CONTROLLED_PATHS = ("/api/v1/chat", "/api/v1/chat/stream")
+RATE_LIMITED_DETAIL = "Zu viele Anfragen in kurzer Zeit. Bitte warte einen Moment und versuche es dann erneut."
+# Retry-After for upstream rate limits that do not say when to retry
+UPSTREAM_RETRY_AFTER_SECONDS = 10
+OVERLOADED_DETAIL = "Der Assistent ist gerade stark ausgelastet. Bitte versuche es in Kürze erneut."
+
+# Generic tech questions forming the web_search_tool centroid of the tool router
+ROUTER_WEB_SEED_QUESTIONS = [
+    "Was ist Kubernetes?",
+    "Wie funktioniert ein Transformer-Modell?",
+    "Was ist der Unterschied zwischen REST und GraphQL?",
+    "Welche Neuerungen bringt Python 3.13?",
+    "Wie richte ich eine CI/CD-Pipeline mit GitHub Actions ein?",
+    "Was ist Retrieval Augmented Generation?",
+    "Wie funktioniert Docker?",
+    "What is the difference between SQL and NoSQL databases?",
+    "How do I fine-tune a large language model?",
+    "What are the latest AI news?",
+    "Explain the CAP theorem",
+    "Qu'est-ce que le cloud computing ?"
+]
@@ -1,11 +1,15 @@
 
 import logging
+import secrets
 from functools import lru_cache
 from typing import Optional
 
+from fastapi import Header, HTTPException
+
 from app.services.llm_service import LLMService
 from app.services.tool_manager import ToolManager
 from app.core.exceptions import LLMServiceError
+from app.core.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
@@ -13,8 +17,8 @@ logger = logging.getLogger(__name__)
 class DIContainer:
     """Dependency Injection Container for managing service instances."""
     
-    def __init__(self):
-        self._llm_service: Optional[LLMService] = None
+    def __init__(self, llm_service: Optional[LLMService] = None):
+        self._llm_service: Optional[LLMService] = llm_service
         self._tool_manager: Optional[ToolManager] = None
     
     def get_llm_service(self) -> LLMService:
@@ -28,6 +32,10 @@ class DIContainer:
                 raise LLMServiceError(f"Failed to initialize LLM service: {str(e)}") from e
         return self._llm_service
     
+    def get_initialized_llm_service(self) -> Optional[LLMService]:
+        """Get the LLM service if it was already created, without creating it."""
+        return self._llm_service
+    
     def get_tool_manager(self) -> ToolManager:
         """Get or create ToolManager instance."""
         if self._tool_manager is None:
@@ -48,6 +56,13 @@ def get_container() -> DIContainer:
     return _container
 
 
+def set_container(container: DIContainer):
+    """Replace the global DI container, e.g. with one holding an injected LLM service."""
+    global _container
+    _container = container
+    get_llm_service.cache_clear()
+
+
 # FastAPI dependency functions
 @lru_cache()
 def get_llm_service() -> LLMService:
@@ -59,3 +74,11 @@ def get_tool_manager() -> ToolManager:
     """FastAPI dependency for ToolManager."""
     return get_container().get_tool_manager()
 
+
+def verify_admin_key(x_admin_key: Optional[str] = Header(default=None)):
+    """FastAPI dependency guarding admin routes with the ``X-Admin-Key`` header."""
+    admin_api_key = get_settings().admin_api_key
+    if not admin_api_key:
+        raise HTTPException(status_code=403, detail="Admin API is disabled. Configure ADMIN_API_KEY.")
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, admin_api_key):
+        raise HTTPException(status_code=403, detail="Invalid admin key")
@@ -1,4 +1,5 @@
 """Custom exceptions for the application."""
+from typing import Optional
 
 
 class ChatbotException(Exception):
@@ -21,6 +22,28 @@ class LLMServiceError(ChatbotException):
     pass
 
 
+class ContextLengthError(LLMServiceError):
+    """Exception raised when a conversation exceeds the model context window."""
+    pass
+
+
+class UpstreamRateLimitError(ChatbotException):
+    """Exception raised when Groq or Tavily rejects a call with a rate or usage limit."""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionRejectedError(ChatbotException):
+    """Exception raised when admission control turns a request away."""
+    
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Request rejected: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
 class ValidationError(ChatbotException):
     """Exception raised for validation errors."""
     pass
@@ -0,0 +1,235 @@
+"""In-process metrics rendered in the Prometheus text exposition format."""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> Iterator[tuple[str, dict, float]]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        """Render the HELP/TYPE header and all samples."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for name, labels, value in self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set."""
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> Iterator[tuple[str, dict, float]]:
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Gauge(_Metric):
+    """Value that goes up and down per label set."""
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any):
+        self.inc(-amount, **labels)
+
+    def _samples(self) -> Iterator[tuple[str, dict, float]]:
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count of observations per label set."""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # One count per bucket, then sum and count.
+                counts = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-2] += value
+            counts[-1] += 1
+
+    def _samples(self) -> Iterator[tuple[str, dict, float]]:
+        with self._lock:
+            values = {key: list(counts) for key, counts in self._values.items()}
+        for key, counts in values.items():
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, counts[-2]
+            yield f"{self.name}_count", labels, counts[-1]
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the text exposition format."""
+
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def _register(self, metric: _Metric) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render all metrics."""
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge("porto_http_requests_in_flight", "HTTP requests being processed")
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "porto_http_request_duration_seconds", "HTTP request latency until response headers", ("method", "route", "status")
+)
+AGENT_INVOCATIONS = REGISTRY.counter(
+    "porto_agent_invocations_total", "Chat turns by model, answer path and outcome", ("model", "path", "outcome")
+)
+AGENT_INVOCATION_DURATION = REGISTRY.histogram(
+    "porto_agent_invocation_duration_seconds", "Chat turn latency by model and answer path", ("model", "path")
+)
+LLM_CALL_DURATION = REGISTRY.histogram("porto_llm_call_duration_seconds", "Chat model call latency", ("model", "outcome"))
+EMBEDDING_REQUEST_DURATION = REGISTRY.histogram(
+    "porto_embedding_request_duration_seconds", "Embedding API call latency (cache misses only)", ("operation",)
+)
+RETRIEVAL_DURATION = REGISTRY.histogram("porto_retrieval_duration_seconds", "Knowledge base search latency", ("path",))
+WEB_SEARCH_REQUEST_DURATION = REGISTRY.histogram(
+    "porto_web_search_request_duration_seconds", "Tavily search call latency", ("outcome",)
+)
+TOOL_EXECUTIONS = REGISTRY.counter("porto_tool_executions_total", "Tool executions by the agent or the tool router", ("tool", "outcome"))
+TOOL_EXECUTION_DURATION = REGISTRY.histogram("porto_tool_execution_duration_seconds", "Tool execution latency", ("tool",))
+CACHE_LOOKUPS = REGISTRY.counter(
+    "porto_cache_lookups_total", "Lookups of the embedding, web search, response and agent caches by result", ("cache", "result")
+)
+CACHE_ENTRIES = REGISTRY.gauge("porto_cache_entries", "Entries held per in-memory cache", ("cache",))
+RESPONSE_CACHE_SAVED_SECONDS = REGISTRY.counter(
+    "porto_response_cache_saved_seconds_total", "Agent latency saved by semantic response cache hits"
+)
+COALESCED_CALLS = REGISTRY.counter(
+    "porto_coalesced_calls_total",
+    "Coalesced calls by operation and role (leader executes, follower shares, follower_timeout runs its own)",
+    ("operation", "role")
+)
+COALESCING_IN_FLIGHT = REGISTRY.gauge("porto_coalescing_in_flight", "Shared executions running", ("operation",))
+SPECULATIVE_RETRIEVALS = REGISTRY.counter(
+    "porto_speculative_retrievals_total", "Speculative retrievals started and whether the model's retriever call used them", ("event",)
+)
+TOOL_ROUTER_DECISIONS = REGISTRY.counter(
+    "porto_tool_router_decisions_total", "Tool router decisions by tool (agent: left to the model) and reason", ("tool", "reason")
+)
+CHECKPOINTER_EVICTIONS = REGISTRY.counter(
+    "porto_checkpointer_evicted_threads_total", "Conversation threads evicted by TTL or the thread cap", ("backend",)
+)
+CHECKPOINTER_THREADS = REGISTRY.gauge("porto_checkpointer_threads", "Conversation threads held in memory (memory backend)")
+KNOWLEDGE_RELOADS = REGISTRY.counter("porto_knowledge_reloads_total", "Knowledge base reloads by outcome", ("outcome",))
+KNOWLEDGE_BASE_DOCUMENTS = REGISTRY.gauge("porto_knowledge_base_documents", "Documents in the live vector index")
+PROCESS_RESIDENT_MEMORY = REGISTRY.gauge("porto_process_resident_memory_bytes", "Resident set size of the worker process")
+ADMISSION_IN_FLIGHT = REGISTRY.gauge("porto_admission_in_flight", "Chat requests holding an admission slot")
+ADMISSION_QUEUE_DEPTH = REGISTRY.gauge("porto_admission_queue_depth", "Chat requests waiting for an admission slot")
+ADMISSION_QUEUE_WAIT = REGISTRY.histogram("porto_admission_queue_wait_seconds", "Time admitted chat requests waited for a slot")
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    "porto_admission_rejections_total", "Chat requests turned away by admission control or upstream rate limits", ("reason",)
+)
+MESSAGE_PARSE_DURATION = REGISTRY.histogram(
+    "porto_message_parse_duration_seconds", "Time to extract the answer and tool calls from the agent state",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)
+)
+
+
+@contextmanager
+def timed(histogram: Histogram, outcome_label: bool = False, **labels: Any) -> Iterator[None]:
+    """Observe the block duration, adding ``outcome=success|error`` if ``outcome_label`` is set."""
+    start = time.perf_counter()
+    outcome = "success"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        if outcome_label:
+            labels["outcome"] = outcome
+        histogram.observe(time.perf_counter() - start, **labels)
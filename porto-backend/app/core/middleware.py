@@ -1,8 +1,17 @@
 """Custom middleware for the application."""
+import json
 import logging
 import time
+from typing import Optional
 from fastapi import Request, Response
+from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.admission import AdmissionController
+from app.core.constants import ADMISSION_CONTROLLED_PATHS, OVERLOADED_DETAIL, RATE_LIMITED_DETAIL
+from app.core.exceptions import AdmissionRejectedError
+from app.core.metrics import HTTP_REQUESTS_IN_FLIGHT, HTTP_REQUEST_DURATION
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +50,130 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         return response
 
 
+class MetricsMiddleware(BaseHTTPMiddleware):
+    """Middleware recording in-flight requests and latency per route template."""
+    
+    async def dispatch(self, request: Request, call_next):
+        """Process request and record its metrics."""
+        start_time = time.perf_counter()
+        status = 500
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # Label by route template, not raw path, to keep cardinality bounded.
+            route = request.scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start_time,
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=status
+            )
+
+
+class AdmissionControlMiddleware:
+    """Middleware applying admission control to the chat endpoints.
+    
+    Plain ASGI rather than BaseHTTPMiddleware: the slot is held until a
+    streamed answer has finished, and the buffered body is replayed to the
+    app after the thread ID has been read from it.
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        paths: tuple[str, ...] = ADMISSION_CONTROLLED_PATHS,
+        forwarded_for_hops: int = 0
+    ):
+        self.app = app
+        self.controller = controller
+        self.paths = paths
+        self.forwarded_for_hops = forwarded_for_hops
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        
+        body = await self._read_body(receive)
+        if body is None:
+            return
+        receive = self._replay(body, receive)
+        
+        try:
+            await self.controller.acquire(self._client_ip(scope), self._thread_id(body))
+        except AdmissionRejectedError as e:
+            logger.warning(f"Admission rejected ({e.reason}), retry after {e.retry_after}s - Path: {scope['path']}")
+            detail = OVERLOADED_DETAIL if e.reason.startswith("queue") else RATE_LIMITED_DETAIL
+            response = JSONResponse({"detail": detail}, status_code=429, headers={"Retry-After": str(e.retry_after)})
+            await response(scope, receive, send)
+            return
+        
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(time.perf_counter() - start_time)
+    
+    def _client_ip(self, scope: Scope) -> str:
+        """Get the client IP, from X-Forwarded-For when running behind trusted proxies.
+        
+        Each of the ``forwarded_for_hops`` proxies appends the address it saw,
+        so the client is that many entries from the right; entries further left
+        are set by the caller and cannot be trusted.
+        """
+        if self.forwarded_for_hops > 0:
+            forwarded = [
+                entry.strip()
+                for name, value in scope["headers"] if name == b"x-forwarded-for"
+                for entry in value.decode("latin-1").split(",") if entry.strip()
+            ]
+            if len(forwarded) >= self.forwarded_for_hops:
+                return forwarded[-self.forwarded_for_hops]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+    
+    @staticmethod
+    def _thread_id(body: bytes) -> Optional[str]:
+        """Read the thread ID from a chat request body; malformed bodies are left to validation."""
+        try:
+            thread_id = json.loads(body).get("thread_id")
+        except (ValueError, AttributeError):
+            return None
+        return thread_id if isinstance(thread_id, str) else None
+    
+    @staticmethod
+    async def _read_body(receive: Receive) -> Optional[bytes]:
+        """Buffer the request body; None if the client disconnected."""
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        return b"".join(chunks)
+    
+    @staticmethod
+    def _replay(body: bytes, receive: Receive) -> Receive:
+        """Serve the buffered body once, then hand over to the original receive."""
+        replayed = False
+        
+        async def replay() -> Message:
+            nonlocal replayed
+            if replayed:
+                return await receive()
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        
+        return replay
+
+
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     """Middleware for adding security headers."""
     
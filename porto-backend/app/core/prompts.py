@@ -54,4 +54,14 @@ REGELN:
 - Jede Antwort ist unabhängig
 - Nur Tools der aktuellen Anfrage verwenden
 - Tool-Auswahl basierend auf Fragentyp treffen
-"""
\ No newline at end of file
+"""
+
+SUMMARY_PROMPT = """
+Du fasst den bisherigen Verlauf eines Chats für den weiteren Gesprächsverlauf zusammen.
+
+REGELN:
+- Maximal 5 kurze Stichpunkte
+- Behalte Fakten, Namen, Links und offene Fragen des Nutzers
+- Eine vorhandene Zusammenfassung wird fortgeschrieben, nicht wiederholt
+- Sprache der Zusammenfassung: Deutsch
+"""
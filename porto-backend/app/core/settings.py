@@ -20,8 +20,95 @@ class Settings(BaseSettings):
     groq_api_key: Optional[str] = None
     openai_api_key: Optional[str] = None
     
+    # Model Settings
+    allowed_models: str = (
+        "meta-llama/llama-4-scout-17b-16e-instruct,qwen/qwen3-32b,moonshotai/kimi-k2-instruct-0905,"
+        "openai/gpt-oss-120b,openai/gpt-oss-20b,llama-3.1-8b-instant,llama-3.3-70b-versatile"
+    )
+    agent_pool_size: int = 8
+    
+    # Conversation Memory Settings
+    checkpointer_backend: str = "memory"
+    checkpointer_sqlite_path: str = "portfolio-db/checkpoints.sqlite"
+    checkpointer_max_threads: int = 10000
+    checkpointer_thread_ttl_seconds: int = 3600
+    checkpointer_max_checkpoints_per_thread: int = 1
+    
+    # Context Policy Settings
+    context_max_tokens: int = 6000
+    context_model_token_budgets: str = ""
+    context_summarization: bool = False
+    context_tool_result_max_chars: int = 300
+    
+    # Embedding Cache Settings
+    embedding_cache_size: int = 2048
+    embedding_cache_dir: Optional[str] = None
+    
+    # FAQ Fast Path Settings
+    faq_fast_path: bool = False
+    faq_similarity_threshold: float = 0.92
+    
+    # Tool Router Settings
+    tool_router_enabled: bool = False
+    tool_router_margin: float = 0.1
+    tool_router_min_similarity: float = 0.3
+    tool_router_keywords: str = "herman,tsago,smartagentai,codex-chatbot,paiya"
+    
+    # Vector Index Settings
+    vector_index_type: str = "flat"
+    vector_index_hnsw_m: int = 32
+    vector_index_hnsw_ef_construction: int = 40
+    vector_index_hnsw_ef_search: int = 64
+    vector_index_ivf_nlist: int = 256
+    vector_index_ivf_nprobe: int = 16
+    vector_index_pq_m: int = 64
+    vector_index_pq_nbits: int = 8
+    
+    # Hybrid Retrieval Settings
+    retrieval_mode: str = "dense"
+    retrieval_rrf_k: int = 60
+    retrieval_lexical_decisive_ratio: float = 2.0
+    retrieval_lexical_min_score: float = 5.0
+    
+    # Speculative Retrieval Settings
+    speculative_retrieval: bool = False
+    speculative_retrieval_min_overlap: float = 0.75
+    
+    # Response Cache Settings
+    response_cache_enabled: bool = False
+    response_cache_threshold: float = 0.95
+    response_cache_size: int = 512
+    response_cache_ttl_seconds: float = 3600
+    
+    # Request Coalescing Settings
+    coalescing_enabled: bool = True
+    coalescing_timeout_seconds: float = 60
+    
+    # Knowledge Base Reload Settings
+    admin_api_key: Optional[str] = None
+    knowledge_reload_interval_seconds: float = 0
+    
+    # Admission Control Settings
+    admission_max_in_flight: int = 16
+    admission_max_queue: int = 32
+    admission_queue_timeout_seconds: float = 10
+    admission_ip_rate_per_minute: float = 0
+    admission_ip_burst: int = 10
+    admission_thread_rate_per_minute: float = 20
+    admission_thread_burst: int = 8
+    admission_max_tracked_clients: int = 10000
+    admission_forwarded_for_hops: int = 0
+    
+    # Tracing Settings
+    tracing_sample_rate: float = 0.0
+    tracing_exporter: str = "console"
+    tracing_file_path: str = "traces.jsonl"
+    
     # Tavily Settings
     tavily_api_key: Optional[str] = None
+    web_search_timeout_seconds: float = 10
+    web_search_cache_size: int = 256
+    web_search_cache_ttl_seconds: float = 900
     
     # Application Settings
     debug_mode: bool = True
@@ -39,6 +126,26 @@ class Settings(BaseSettings):
         populate_by_name = True
         extra = "ignore"
     
+    @property
+    def allowed_models_list(self) -> list[str]:
+        """Get allowed LLM models as a list."""
+        return [m.strip() for m in self.allowed_models.split(",") if m.strip()] if self.allowed_models != "*" else ["*"]
+    
+    @property
+    def context_model_token_budgets_map(self) -> dict[str, int]:
+        """Get per-model token budgets from ``model=tokens`` pairs."""
+        budgets = {}
+        for pair in self.context_model_token_budgets.split(","):
+            model, _, tokens = pair.rpartition("=")
+            if model.strip() and tokens.strip().isdigit():
+                budgets[model.strip()] = int(tokens)
+        return budgets
+    
+    @property
+    def tool_router_keywords_list(self) -> list[str]:
+        """Get the tool router's portfolio keywords as a list."""
+        return [k.strip() for k in self.tool_router_keywords.split(",") if k.strip()]
+    
     @property
     def cors_origins_list(self) -> list[str]:
         """Get CORS origins as a list."""
@@ -0,0 +1,70 @@
+"""Request coalescing for identical concurrent calls."""
+import asyncio
+from typing import Any, Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+from app.core.metrics import COALESCED_CALLS
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Coalesces concurrent calls with the same key into one execution.
+
+    The first caller starts ``fn`` as a task; callers arriving while it runs
+    await the same task and share its result or exception. Nothing is kept
+    after completion. The first caller waits for its task like an uncoalesced
+    call, so its own timeouts apply. A later caller waits for the shared task
+    at most ``timeout_seconds`` and then runs ``fn`` itself, so a stuck
+    execution only costs its followers time. The shared task is shielded, so a
+    cancelled caller does not abort it for the others.
+    """
+
+    def __init__(self, timeout_seconds: Optional[float] = None, name: str = "default"):
+        self.timeout_seconds = timeout_seconds
+        self.name = name
+        self._flights: dict[Hashable, asyncio.Task] = {}
+        self.executions = 0
+        self.shared = 0
+        self.timeouts = 0
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller gave up waiting.
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn`` once for all concurrent callers with ``key``."""
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            self.executions += 1
+            COALESCED_CALLS.inc(operation=self.name, role="leader")
+            task.add_done_callback(lambda done: self._forget(key, done))
+            return await asyncio.shield(task)
+        
+        self.shared += 1
+        COALESCED_CALLS.inc(operation=self.name, role="follower")
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            if task.done():
+                # The shared call itself timed out; its callers all see that.
+                raise
+            self.timeouts += 1
+            COALESCED_CALLS.inc(operation=self.name, role="follower_timeout")
+        return await fn()
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get in-flight, execution and sharing counters."""
+        return {
+            "in_flight": len(self._flights),
+            "executions": self.executions,
+            "shared": self.shared,
+            "timeouts": self.timeouts
+        }
@@ -0,0 +1,9 @@
+"""Text normalization helpers for cache keys and matching."""
+import re
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a user query: casefolded, trimmed and with collapsed whitespace."""
+    return _WHITESPACE.sub(" ", text).strip().casefold()
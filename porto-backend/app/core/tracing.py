@@ -0,0 +1,158 @@
+"""Lightweight request tracing with spans in the OpenTelemetry style.
+
+A root span per chat request is sampled with ``TRACING_SAMPLE_RATE``; child
+spans only record inside a sampled trace and are free otherwise. When the root
+span ends, the whole trace is exported as one JSON object (console log or a
+JSONL file) with every span's offset and duration, so the critical path of a
+slow request can be read off directly.
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Iterator, Optional
+
+from app.core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+EXPORTERS = ("console", "file")
+
+
+@dataclass
+class Span:
+    """Timed operation inside a trace."""
+    name: str
+    trace: "Trace"
+    span_id: str
+    parent_id: Optional[str]
+    attributes: dict = field(default_factory=dict)
+    start: float = field(default_factory=time.perf_counter)
+    end: Optional[float] = None
+    status: str = "ok"
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_offset_ms": round((self.start - self.trace.root.start) * 1000, 3),
+            "duration_ms": round(((self.end or time.perf_counter()) - self.start) * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+
+class Trace:
+    """Spans of one sampled request."""
+
+    def __init__(self, name: str, attributes: dict):
+        self.trace_id = os.urandom(16).hex()
+        self.started_at = time.time()
+        self.spans: list[Span] = []
+        self.root = self.new_span(name, None, attributes)
+
+    def new_span(self, name: str, parent_id: Optional[str], attributes: dict) -> Span:
+        span = Span(name=name, trace=self, span_id=os.urandom(8).hex(), parent_id=parent_id, attributes=attributes)
+        self.spans.append(span)
+        return span
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "thread_id": self.root.attributes.get("thread_id"),
+            "timestamp": self.started_at,
+            "duration_ms": self.root.to_dict()["duration_ms"],
+            "spans": [span.to_dict() for span in self.spans]
+        }
+
+
+class TraceExporter:
+    """Writes finished traces to the log or appends them to a JSONL file."""
+
+    def __init__(self, exporter: str, file_path: str):
+        if exporter not in EXPORTERS:
+            raise ValueError(f"Unknown tracing exporter '{exporter}', expected one of {', '.join(EXPORTERS)}")
+        self.exporter = exporter
+        self.file_path = file_path
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        line = json.dumps(trace.to_dict(), ensure_ascii=False, default=str)
+        if self.exporter == "console":
+            logger.info(f"Trace {line}")
+            return
+        try:
+            with self._lock, open(self.file_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to export trace {trace.trace_id}: {e}")
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("tracing_span", default=None)
+
+
+@lru_cache()
+def get_exporter() -> TraceExporter:
+    """Get the exporter configured in the settings."""
+    settings = get_settings()
+    return TraceExporter(settings.tracing_exporter, settings.tracing_file_path)
+
+
+def current_span() -> Optional[Span]:
+    """Get the active span of the current request, if it is traced."""
+    return _current_span.get()
+
+
+@contextmanager
+def _activate(span: Span) -> Iterator[Span]:
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = "error"
+        span.attributes["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span.end = time.perf_counter()
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Streaming generators may be closed from another context.
+            _current_span.set(None)
+
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Start a root span, sampled with ``TRACING_SAMPLE_RATE``; yields None if not sampled."""
+    sample_rate = get_settings().tracing_sample_rate
+    if sample_rate <= 0 or random.random() >= sample_rate:
+        yield None
+        return
+    trace = Trace(name, attributes)
+    try:
+        with _activate(trace.root) as root:
+            yield root
+    finally:
+        get_exporter().export(trace)
+
+
+@contextmanager
+def start_span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Start a child of the active span; a no-op yielding None outside a sampled trace."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    with _activate(parent.trace.new_span(name, parent.span_id, attributes)) as span:
+        yield span
@@ -1,10 +1,17 @@
 """Main FastAPI application."""
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
 from app.api.chat import router as chat_router
-from app.core.middleware import LoggingMiddleware, SecurityHeadersMiddleware
+from app.core.admission import get_admission_controller
+from app.core.middleware import AdmissionControlMiddleware, LoggingMiddleware, MetricsMiddleware, SecurityHeadersMiddleware
+from app.core.dependencies import get_container, get_llm_service
+from app.core.metrics import REGISTRY
 from app.core.settings import get_settings
 
 # Configure logging
@@ -17,16 +24,39 @@ logger = logging.getLogger(__name__)
 # Get settings
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the knowledge base watcher if a reload interval is configured."""
+    watcher = None
+    if settings.knowledge_reload_interval_seconds > 0:
+        llm_service = await asyncio.to_thread(get_llm_service)
+        watcher = asyncio.create_task(llm_service.knowledge_reloader.watch(settings.knowledge_reload_interval_seconds))
+    yield
+    if watcher is not None:
+        watcher.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await watcher
+
+
 # Create FastAPI app
 app = FastAPI(
     title="AI Studio - Portfolio Chatbot API",
     description="AI-powered chatbot for Herman Tsago's portfolio",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# Add middleware (order matters - first added is outermost)
+# Add middleware (order matters - last added is outermost)
+# Admission control is innermost so CORS, metrics and logging also see its 429s.
+app.add_middleware(
+    AdmissionControlMiddleware,
+    controller=get_admission_controller(),
+    forwarded_for_hops=settings.admission_forwarded_for_hops
+)
 app.add_middleware(SecurityHeadersMiddleware)
 app.add_middleware(LoggingMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins_list,
@@ -46,6 +76,14 @@ def root():
 def health_check():
     return {"status": "healthy", "service": "portfolio-chatbot"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus metrics; service gauges are read without scanning the stores."""
+    llm_service = get_container().get_initialized_llm_service()
+    if llm_service is not None:
+        llm_service.collect_metrics()
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8090, reload=True)
@@ -28,6 +28,7 @@ class ToolCall(BaseModel):
     args: dict = Field(default_factory=dict, description="Tool arguments")
     mcp: bool = Field(default=False, description="MCP tool flag")
     tool_schema: Optional[dict] = Field(default=None, description="Tool schema")
+    cache_hit: Optional[dict] = Field(default=None, description="FAQ match (match type and score) that answered the call without running the tool")
 
 
 class DebugInfo(BaseModel):
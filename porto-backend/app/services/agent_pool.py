@@ -0,0 +1,63 @@
+"""Bounded pool of prebuilt agents keyed by model."""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from app.core.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+class AgentPool:
+    """LRU cache of compiled agents.
+
+    Agents are immutable once built, so concurrent requests can share them
+    without coordination; only pool membership is guarded by a lock.
+    """
+
+    def __init__(self, factory: Callable[..., Any], max_size: int = 8):
+        self._factory = factory
+        self._max_size = max(1, max_size)
+        self._agents: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, *key: Hashable) -> Any:
+        """Return the agent for ``key``, building it on first use."""
+        with self._lock:
+            agent = self._agents.get(key)
+            if agent is not None:
+                self._agents.move_to_end(key)
+                self.hits += 1
+                CACHE_LOOKUPS.inc(cache="agent_pool", result="hit")
+                return agent
+            self.misses += 1
+            CACHE_LOOKUPS.inc(cache="agent_pool", result="miss")
+
+        agent = self._factory(*key)
+
+        with self._lock:
+            # Another request may have built the same agent meanwhile; keep the first.
+            existing = self._agents.get(key)
+            if existing is not None:
+                self._agents.move_to_end(key)
+                return existing
+            self._agents[key] = agent
+            while len(self._agents) > self._max_size:
+                evicted, _ = self._agents.popitem(last=False)
+                logger.info(f"Evicted agent {evicted} from pool")
+        return agent
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def get_stats(self) -> dict:
+        """Get pool size and hit/miss counters."""
+        return {
+            "size": len(self._agents),
+            "max_size": self._max_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,580 @@
+"""Conversation checkpointers: bounded in-memory and durable SQLite."""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+from app.core.metrics import CHECKPOINTER_EVICTIONS
+from app.core.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """In-memory checkpointer that evicts idle and least recently used threads.
+
+    Besides the thread bounds, only the newest ``max_checkpoints_per_thread``
+    checkpoints of a thread are kept (latest-only by default), together with
+    the pending writes and channel blobs they reference. Checkpoint and byte
+    totals are kept up to date on every write, so ``get_stats`` never scans.
+    """
+
+    def __init__(
+        self,
+        max_threads: int = 10000,
+        thread_ttl_seconds: float = 3600,
+        max_checkpoints_per_thread: int = 1,
+        **kwargs: Any
+    ):
+        super().__init__(**kwargs)
+        self.max_threads = max(1, max_threads)
+        self.thread_ttl_seconds = thread_ttl_seconds
+        self.max_checkpoints_per_thread = max(1, max_checkpoints_per_thread)
+        self.evicted_threads = 0
+        self._last_access: OrderedDict[str, float] = OrderedDict()
+        self._blob_keys: dict[str, set] = {}
+        self._write_keys: dict[str, set] = {}
+        self._thread_totals: dict[str, tuple[int, int]] = {}
+        self._checkpoints = 0
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+    def _touch(self, thread_id: str):
+        """Mark a thread as recently used."""
+        self._last_access[thread_id] = time.monotonic()
+        self._last_access.move_to_end(thread_id)
+
+    def _set_totals(self, thread_id: str, totals: tuple[int, int]):
+        """Replace a thread's (checkpoints, bytes) in the running totals."""
+        checkpoints, bytes_held = self._thread_totals.pop(thread_id, (0, 0))
+        self._checkpoints += totals[0] - checkpoints
+        self._bytes += totals[1] - bytes_held
+        if totals != (0, 0):
+            self._thread_totals[thread_id] = totals
+
+    def _account(self, thread_id: str):
+        """Recount one thread after a write; bounded by the per-thread checkpoint limit."""
+        namespaces = self.storage.get(thread_id, {})
+        checkpoints = sum(len(ns) for ns in namespaces.values())
+        bytes_held = sum(
+            len(checkpoint[1]) + len(metadata[1])
+            for ns in namespaces.values()
+            for checkpoint, metadata, _ in ns.values()
+        )
+        bytes_held += sum(len(self.blobs[key][1]) for key in self._blob_keys.get(thread_id, ()) if key in self.blobs)
+        bytes_held += sum(
+            len(write[2][1])
+            for key in self._write_keys.get(thread_id, ())
+            for write in self.writes.get(key, {}).values()
+        )
+        self._set_totals(thread_id, (checkpoints, bytes_held))
+
+    def _evict(self, keep: Optional[str] = None):
+        """Drop expired threads, then least recently used ones above the cap."""
+        now = time.monotonic()
+        while self._last_access:
+            thread_id, last_access = next(iter(self._last_access.items()))
+            expired = self.thread_ttl_seconds and now - last_access > self.thread_ttl_seconds
+            if thread_id == keep or not (expired or len(self._last_access) > self.max_threads):
+                break
+            self._delete_thread(thread_id)
+            self.evicted_threads += 1
+            CHECKPOINTER_EVICTIONS.inc(backend="memory")
+
+    def _prune_thread(self, thread_id: str, checkpoint_ns: str, latest_versions: ChannelVersions):
+        """Keep only the newest checkpoints of a thread namespace and what they reference."""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.max_checkpoints_per_thread:
+            return
+        ordered = sorted(checkpoints)
+        for checkpoint_id in ordered[:-self.max_checkpoints_per_thread]:
+            del checkpoints[checkpoint_id]
+            write_key = (thread_id, checkpoint_ns, checkpoint_id)
+            self.writes.pop(write_key, None)
+            self._write_keys.get(thread_id, set()).discard(write_key)
+
+        referenced = {(channel, version) for channel, version in latest_versions.items()}
+        for checkpoint_id in ordered[-self.max_checkpoints_per_thread:-1]:
+            checkpoint = self.serde.loads_typed(checkpoints[checkpoint_id][0])
+            referenced.update(checkpoint["channel_versions"].items())
+
+        blob_keys = self._blob_keys.get(thread_id, set())
+        for key in [k for k in blob_keys if k[1] == checkpoint_ns and (k[2], k[3]) not in referenced]:
+            self.blobs.pop(key, None)
+            blob_keys.discard(key)
+
+    def _delete_thread(self, thread_id: str):
+        """Delete a thread using the per-thread key indexes."""
+        self.storage.pop(thread_id, None)
+        for key in self._write_keys.pop(thread_id, ()):
+            self.writes.pop(key, None)
+        for key in self._blob_keys.pop(thread_id, ()):
+            self.blobs.pop(key, None)
+        self._last_access.pop(thread_id, None)
+        self._set_totals(thread_id, (0, 0))
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            # Avoid materialising empty entries for unknown threads in the defaultdict.
+            if thread_id not in self.storage:
+                return None
+            self._touch(thread_id)
+            return super().get_tuple(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        # Snapshot under the lock so eviction cannot resize the dicts mid-iteration;
+        # ``alist`` goes through here as well.
+        with self._lock:
+            if config:
+                thread_id = config["configurable"]["thread_id"]
+                if thread_id not in self.storage:
+                    return iter(())
+                self._touch(thread_id)
+            items = list(super().list(config, filter=filter, before=before, limit=limit))
+        return iter(items)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._lock:
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+            self._blob_keys.setdefault(thread_id, set()).update(
+                (thread_id, checkpoint_ns, channel, version) for channel, version in new_versions.items()
+            )
+            self._prune_thread(thread_id, checkpoint_ns, checkpoint["channel_versions"])
+            self._account(thread_id)
+            self._touch(thread_id)
+            self._evict(keep=thread_id)
+            return next_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+            self._write_keys.setdefault(thread_id, set()).add(
+                (thread_id, config["configurable"].get("checkpoint_ns", ""), config["configurable"]["checkpoint_id"])
+            )
+            self._account(thread_id)
+            self._touch(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._delete_thread(thread_id)
+
+    def thread_count(self) -> Optional[int]:
+        """Number of threads held, read without a lock or scan."""
+        return len(self._last_access)
+
+    def get_stats(self) -> dict:
+        """Get gauges for threads, checkpoints and serialized bytes held.
+
+        Reads the running totals only; expired threads are counted until the
+        next write evicts them.
+        """
+        return {
+            "backend": "memory",
+            "threads": len(self._last_access),
+            "checkpoints": self._checkpoints,
+            "bytes": self._bytes,
+            "evicted_threads": self.evicted_threads,
+            "max_threads": self.max_threads
+        }
+
+    async def aget_stats(self) -> dict:
+        """Async version of ``get_stats``."""
+        return self.get_stats()
+
+
+class SQLiteSaver(BaseCheckpointSaver):
+    """Durable checkpointer backed by a single SQLite file in WAL mode.
+
+    Each checkpoint is stored as one serialized row including its channel
+    values, and only the newest ``max_checkpoints_per_thread`` rows per thread
+    are kept. WAL lets several uvicorn workers on the same host read
+    concurrently while one writes; it relies on shared memory next to the
+    file, so the file must not live on a network filesystem or a volume
+    mounted by pods on different nodes. Async methods run the (short) queries in
+    the default executor so the event loop never waits on the file lock.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS checkpoints (
+            thread_id TEXT NOT NULL,
+            checkpoint_ns TEXT NOT NULL DEFAULT '',
+            checkpoint_id TEXT NOT NULL,
+            parent_checkpoint_id TEXT,
+            type TEXT,
+            checkpoint BLOB,
+            metadata_type TEXT,
+            metadata BLOB,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+        );
+        CREATE INDEX IF NOT EXISTS checkpoints_updated_at ON checkpoints (updated_at);
+        CREATE TABLE IF NOT EXISTS writes (
+            thread_id TEXT NOT NULL,
+            checkpoint_ns TEXT NOT NULL DEFAULT '',
+            checkpoint_id TEXT NOT NULL,
+            task_id TEXT NOT NULL,
+            idx INTEGER NOT NULL,
+            channel TEXT NOT NULL,
+            type TEXT,
+            value BLOB,
+            task_path TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+        );
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_threads: int = 10000,
+        thread_ttl_seconds: float = 3600,
+        max_checkpoints_per_thread: int = 1,
+        housekeeping_interval_seconds: float = 60,
+        **kwargs: Any
+    ):
+        super().__init__(**kwargs)
+        self.path = path
+        self.max_threads = max(1, max_threads)
+        self.thread_ttl_seconds = thread_ttl_seconds
+        self.max_checkpoints_per_thread = max(1, max_checkpoints_per_thread)
+        self.housekeeping_interval_seconds = housekeeping_interval_seconds
+        self.evicted_threads = 0
+        self._last_housekeeping = time.monotonic()
+        self._local = threading.local()
+        # Guards the counters updated from executor threads.
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _build_tuple(self, conn: sqlite3.Connection, row: tuple) -> CheckpointTuple:
+        """Turn a checkpoints row into a CheckpointTuple with its pending writes."""
+        thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata_type, metadata = row
+        writes = conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id)
+        ).fetchall()
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((w_type, value)))
+                for task_id, channel, w_type, value in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        conn = self._connection()
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+            "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        if checkpoint_id := get_checkpoint_id(config):
+            row = conn.execute(query + " AND checkpoint_id = ?", (thread_id, checkpoint_ns, checkpoint_id)).fetchone()
+        else:
+            row = conn.execute(query + " ORDER BY checkpoint_id DESC LIMIT 1", (thread_id, checkpoint_ns)).fetchone()
+        return self._build_tuple(conn, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        conn = self._connection()
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_checkpoint_id)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = conn.execute(
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+            f"FROM checkpoints{where} ORDER BY checkpoint_id DESC",
+            params
+        ).fetchall()
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            checkpoint_tuple = self._build_tuple(conn, row)
+            if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, serialized_checkpoint = self.serde.dumps_typed(checkpoint)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                    type_, serialized_checkpoint, metadata_type, serialized_metadata, time.time()
+                )
+            )
+            stale = conn.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+                (thread_id, checkpoint_ns, self.max_checkpoints_per_thread)
+            ).fetchall()
+            for (checkpoint_id,) in stale:
+                conn.execute(
+                    "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id)
+                )
+                conn.execute(
+                    "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id)
+                )
+        self._maybe_housekeep()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, serialized = self.serde.dumps_typed(value)
+            rows.append((
+                thread_id, checkpoint_ns, checkpoint_id, task_id,
+                WRITES_IDX_MAP.get(channel, idx), channel, type_, serialized, task_path
+            ))
+        # Special writes (errors, interrupts) overwrite; regular writes are idempotent.
+        replace = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+
+    def _maybe_housekeep(self):
+        """Evict idle and surplus threads at most once per housekeeping interval."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_housekeeping < self.housekeeping_interval_seconds:
+                return
+            self._last_housekeeping = now
+        self.evict()
+
+    def evict(self) -> int:
+        """Delete threads idle beyond the TTL and the oldest ones above the cap."""
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            threads = conn.execute(
+                "SELECT thread_id, MAX(updated_at) AS last_access FROM checkpoints "
+                "GROUP BY thread_id ORDER BY last_access ASC"
+            ).fetchall()
+            cutoff = time.time() - self.thread_ttl_seconds if self.thread_ttl_seconds else None
+            surplus = max(0, len(threads) - self.max_threads)
+            evict = [
+                thread_id for i, (thread_id, last_access) in enumerate(threads)
+                if i < surplus or (cutoff is not None and last_access < cutoff)
+            ]
+            for thread_id in evict:
+                conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+        with self._lock:
+            self.evicted_threads += len(evict)
+        CHECKPOINTER_EVICTIONS.inc(len(evict), backend="sqlite")
+        return len(evict)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def thread_count(self) -> Optional[int]:
+        """Not tracked; counting threads would scan the table."""
+        return None
+
+    def get_stats(self) -> dict:
+        """Get gauges for threads, checkpoints and serialized bytes held."""
+        conn = self._connection()
+        threads, checkpoints, checkpoint_bytes = conn.execute(
+            "SELECT COUNT(DISTINCT thread_id), COUNT(*), COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints"
+        ).fetchone()
+        (write_bytes,) = conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes").fetchone()
+        return {
+            "backend": "sqlite",
+            "threads": threads,
+            "checkpoints": checkpoints,
+            "bytes": checkpoint_bytes + write_bytes,
+            "evicted_threads": self.evicted_threads,
+            "max_threads": self.max_threads
+        }
+
+    async def aget_stats(self) -> dict:
+        """Async version of ``get_stats``; the aggregate queries run off the event loop."""
+        return await asyncio.to_thread(self.get_stats)
+
+
+def create_checkpointer(settings: Settings) -> BaseCheckpointSaver:
+    """Create the checkpointer selected by ``CHECKPOINTER_BACKEND``."""
+    backend = settings.checkpointer_backend.lower()
+    if backend == "sqlite":
+        logger.info(f"Using SQLite checkpointer at {settings.checkpointer_sqlite_path}")
+        return SQLiteSaver(
+            settings.checkpointer_sqlite_path,
+            max_threads=settings.checkpointer_max_threads,
+            thread_ttl_seconds=settings.checkpointer_thread_ttl_seconds,
+            max_checkpoints_per_thread=settings.checkpointer_max_checkpoints_per_thread
+        )
+    if backend != "memory":
+        raise ValueError(f"Unknown checkpointer backend: {settings.checkpointer_backend}")
+    return BoundedMemorySaver(
+        max_threads=settings.checkpointer_max_threads,
+        thread_ttl_seconds=settings.checkpointer_thread_ttl_seconds,
+        max_checkpoints_per_thread=settings.checkpointer_max_checkpoints_per_thread
+    )
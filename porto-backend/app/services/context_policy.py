@@ -0,0 +1,131 @@
+"""Token-aware context policy for agent conversations."""
+import logging
+from typing import Any, Optional
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, ToolMessage, RemoveMessage
+from langchain_core.messages.utils import count_tokens_approximately, get_buffer_string
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+from app.core.prompts import SUMMARY_PROMPT
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_MESSAGE_ID = "context-summary"
+SUMMARY_PREFIX = "Zusammenfassung des bisherigen Gesprächs:\n"
+
+
+def is_summary_message(message: Any) -> bool:
+    """Check whether a message is the rolling summary inserted by ContextPolicy."""
+    return getattr(message, "id", None) == SUMMARY_MESSAGE_ID
+
+
+class ContextPolicy(AgentMiddleware):
+    """Keeps the thread history sent to the model within a token budget.
+
+    Before every model call, tool results of earlier turns are collapsed and the
+    oldest whole turns are evicted until the history fits ``max_tokens``. The
+    current turn is never touched. With a ``summarizer``, evicted turns are
+    folded into a rolling summary message kept at the start of the thread.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        summarizer: Optional[BaseChatModel] = None,
+        tool_result_max_chars: int = 300
+    ):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer
+        self.tool_result_max_chars = tool_result_max_chars
+
+    def _collapse_tool_results(self, messages: list[BaseMessage]) -> tuple[list[BaseMessage], bool]:
+        """Shorten tool results of previous turns to a short excerpt."""
+        changed = False
+        collapsed = []
+        for message in messages:
+            content = message.content
+            if isinstance(message, ToolMessage) and isinstance(content, str) and len(content) > self.tool_result_max_chars:
+                message = message.model_copy(update={"content": content[:self.tool_result_max_chars - 2].rstrip() + " …"})
+                changed = True
+            collapsed.append(message)
+        return collapsed, changed
+
+    def _split(self, state: dict) -> Optional[tuple[Optional[BaseMessage], list[BaseMessage], list[BaseMessage], list[BaseMessage]]]:
+        """Trim the thread; returns (previous summary, evicted, kept history, current turn) or None if unchanged."""
+        messages = state["messages"]
+        summary = next((m for m in messages if is_summary_message(m)), None)
+        messages = [m for m in messages if not is_summary_message(m)]
+        turn_starts = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+        if len(turn_starts) < 2:
+            return None
+
+        current_start = turn_starts[-1]
+        history, changed = self._collapse_tool_results(messages[:current_start])
+        current = messages[current_start:]
+
+        counts = [count_tokens_approximately([m]) for m in history]
+        total = sum(counts) + count_tokens_approximately(current)
+        if summary is not None:
+            total += count_tokens_approximately([summary])
+
+        cut = 0
+        history_starts = [i for i in turn_starts[:-1] if i > 0] + [current_start]
+        for next_start in history_starts:
+            if total <= self.max_tokens:
+                break
+            total -= sum(counts[cut:next_start])
+            cut = next_start
+
+        if not changed and cut == 0:
+            return None
+        return summary, history[:cut], history[cut:], current
+
+    def _build_update(self, summary: Optional[BaseMessage], summary_text: Optional[str], kept: list[BaseMessage], current: list[BaseMessage]) -> dict:
+        """Replace the thread messages with the trimmed history."""
+        new_messages: list[BaseMessage] = []
+        if summary_text:
+            new_messages.append(HumanMessage(content=SUMMARY_PREFIX + summary_text, id=SUMMARY_MESSAGE_ID))
+        elif summary is not None:
+            new_messages.append(summary)
+        return {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *new_messages, *kept, *current]}
+
+    def _summary_input(self, summary: Optional[BaseMessage], evicted: list[BaseMessage]) -> list[BaseMessage]:
+        """Build the summarizer prompt for the evicted turns."""
+        previous = summary.content if summary is not None else ""
+        return [
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(content=f"{previous}\n\n{get_buffer_string(evicted)}".strip())
+        ]
+
+    def before_model(self, state: Any, runtime: Any) -> Optional[dict[str, Any]]:
+        split = self._split(state)
+        if split is None:
+            return None
+        summary, evicted, kept, current = split
+        summary_text = None
+        if evicted and self.summarizer is not None:
+            try:
+                summary_text = self.summarizer.invoke(self._summary_input(summary, evicted)).content
+            except Exception as e:
+                logger.warning(f"Summarizing evicted turns failed, trimming only: {e}")
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} messages from thread history")
+        return self._build_update(summary, summary_text, kept, current)
+
+    async def abefore_model(self, state: Any, runtime: Any) -> Optional[dict[str, Any]]:
+        split = self._split(state)
+        if split is None:
+            return None
+        summary, evicted, kept, current = split
+        summary_text = None
+        if evicted and self.summarizer is not None:
+            try:
+                summary_text = (await self.summarizer.ainvoke(self._summary_input(summary, evicted))).content
+            except Exception as e:
+                logger.warning(f"Summarizing evicted turns failed, trimming only: {e}")
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} messages from thread history")
+        return self._build_update(summary, summary_text, kept, current)
@@ -1,8 +1,10 @@
 """Debug service for tracking tool executions and debug information."""
 import logging
 import json
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Optional, Any
+from typing import Optional, Any, Iterator
 
 from app.models.chat import ToolExecution
 
@@ -10,32 +12,17 @@ logger = logging.getLogger(__name__)
 
 
 class DebugService:
-    """Service for tracking and storing debug information."""
+    """Debug trace of a single request.
+    
+    A fresh instance is bound to the request context by ``debug_trace``; tools
+    look it up with ``get_debug_trace`` so concurrent requests never share one.
+    """
     
     def __init__(self):
         """Initialize debug service."""
         self.tool_executions: list[ToolExecution] = []
         self.model_responses: list[str] = []
         self.agent_response: Optional[dict] = None
-        self.is_enabled = False
-    
-    def enable(self):
-        """Enable debug mode."""
-        self.is_enabled = True
-        self.tool_executions.clear()
-        self.model_responses.clear()
-        logger.info("Debug mode enabled")
-    
-    def disable(self):
-        """Disable debug mode."""
-        self.is_enabled = False
-        logger.info("Debug mode disabled")
-    
-    def reset(self):
-        """Reset debug information."""
-        self.tool_executions.clear()
-        self.model_responses.clear()
-        self.agent_response = None
     
     def track_tool_execution(
         self,
@@ -46,9 +33,6 @@ class DebugService:
         error: Optional[str] = None
     ):
         """Track a tool execution."""
-        if not self.is_enabled:
-            return
-        
         execution = ToolExecution(
             tool_name=tool_name,
             args=args,
@@ -62,14 +46,10 @@ class DebugService:
     
     def track_model_response(self, response: str):
         """Track a model response."""
-        if not self.is_enabled:
-            return
         self.model_responses.append(response)
     
     def track_agent_response(self, response: Any):
         """Track the full agent response object."""
-        if not self.is_enabled:
-            return
         try:
             if isinstance(response, dict):
                 self.agent_response = self._serialize_response(response)
@@ -104,9 +84,6 @@ class DebugService:
     
     def get_debug_info(self) -> dict:
         """Get all debug information."""
-        if not self.is_enabled:
-            return {}
-        
         return {
             "tool_executions": [
                 {
@@ -125,3 +102,28 @@ class DebugService:
             "total_model_responses": len(self.model_responses)
         }
 
+
+_current_trace: ContextVar[Optional[DebugService]] = ContextVar("debug_trace", default=None)
+
+
+def get_debug_trace() -> Optional[DebugService]:
+    """Get the debug trace of the current request, if debug mode is on."""
+    return _current_trace.get()
+
+
+@contextmanager
+def debug_trace(enabled: bool = True) -> Iterator[Optional[DebugService]]:
+    """Bind a fresh debug trace to the current context for the duration of a request."""
+    if not enabled:
+        yield None
+        return
+    trace = DebugService()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        try:
+            _current_trace.reset(token)
+        except ValueError:
+            # Streaming generators may be closed from another context.
+            _current_trace.set(None)
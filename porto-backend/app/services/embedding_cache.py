@@ -0,0 +1,125 @@
+"""Query embedding cache in front of the embeddings API."""
+import hashlib
+import logging
+import os
+from array import array
+from typing import Optional
+
+from langchain_core.embeddings import Embeddings
+
+from app.core.cache import LRUCache
+from app.core.metrics import CACHE_LOOKUPS, EMBEDDING_REQUEST_DURATION, timed
+from app.core.text import normalize_query
+from app.core.tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that caches query embeddings.
+
+    Queries are keyed on the embedding model and the normalized query text. Lookups
+    go to an in-process LRU first, then to an optional on-disk store holding one
+    float32 file per key, and only then to the wrapped embeddings API. Document
+    embeddings (index builds) pass straight through.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_size: int = 2048, cache_dir: Optional[str] = None):
+        self.embeddings = embeddings
+        self.model = getattr(embeddings, "model", None) or type(embeddings).__name__
+        self.cache_dir = cache_dir or None
+        self._memory: LRUCache[list[float]] = LRUCache(max_size=max_size)
+        self.disk_hits = 0
+        self.misses = 0
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\n{normalize_query(text)}".encode("utf-8")).hexdigest()
+
+    def _read_disk(self, key: str) -> Optional[list[float]]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.f32"), "rb") as f:
+                vector = array("f")
+                vector.frombytes(f.read())
+                return vector.tolist()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Error reading cached embedding {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, vector: list[float]):
+        if not self.cache_dir:
+            return
+        path = os.path.join(self.cache_dir, f"{key}.f32")
+        try:
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(array("f", vector).tobytes())
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Error writing cached embedding {key}: {e}")
+
+    def _lookup(self, key: str) -> Optional[list[float]]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            CACHE_LOOKUPS.inc(cache="embeddings", result="memory_hit")
+            return vector
+        vector = self._read_disk(key)
+        if vector is not None:
+            self.disk_hits += 1
+            CACHE_LOOKUPS.inc(cache="embeddings", result="disk_hit")
+            self._memory.set(key, vector)
+            return vector
+        self.misses += 1
+        CACHE_LOOKUPS.inc(cache="embeddings", result="miss")
+        return None
+
+    def _store(self, key: str, vector: list[float]):
+        self._memory.set(key, vector)
+        self._write_disk(key, vector)
+
+    def embed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        vector = self._lookup(key)
+        if vector is None:
+            with start_span("embeddings.query", model=self.model), timed(EMBEDDING_REQUEST_DURATION, operation="query"):
+                vector = self.embeddings.embed_query(text)
+            self._store(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        vector = self._lookup(key)
+        if vector is None:
+            with start_span("embeddings.query", model=self.model), timed(EMBEDDING_REQUEST_DURATION, operation="query"):
+                vector = await self.embeddings.aembed_query(text)
+            self._store(key, vector)
+        return vector
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        with start_span("embeddings.documents", model=self.model, count=len(texts)), timed(EMBEDDING_REQUEST_DURATION, operation="documents"):
+            return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        with start_span("embeddings.documents", model=self.model, count=len(texts)), timed(EMBEDDING_REQUEST_DURATION, operation="documents"):
+            return await self.embeddings.aembed_documents(texts)
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def get_stats(self) -> dict:
+        """Get hit/miss counters of the memory and disk layers."""
+        memory = self._memory.get_stats()
+        lookups = memory["hits"] + self.disk_hits + self.misses
+        return {
+            "model": self.model,
+            "memory_size": memory["size"],
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (memory["hits"] + self.disk_hits) / lookups if lookups else 0.0
+        }
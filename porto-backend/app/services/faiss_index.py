@@ -0,0 +1,134 @@
+"""FAISS index types for the knowledge base vector store."""
+import logging
+import time
+from dataclasses import asdict, dataclass
+
+import faiss
+import numpy as np
+
+from app.core.exceptions import VectorStoreError
+from app.core.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """FAISS index type and parameters.
+
+    ``hnsw_m``, ``hnsw_ef_construction``, ``ivf_nlist``, ``pq_m`` and
+    ``pq_nbits`` shape the stored index and require a rebuild when changed;
+    ``hnsw_ef_search`` and ``ivf_nprobe`` are search-time knobs applied on load.
+    """
+    type: str = "flat"
+    hnsw_m: int = 32
+    hnsw_ef_construction: int = 40
+    hnsw_ef_search: int = 64
+    ivf_nlist: int = 256
+    ivf_nprobe: int = 16
+    pq_m: int = 64
+    pq_nbits: int = 8
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "IndexSpec":
+        """Read the index spec from the ``VECTOR_INDEX_*`` settings."""
+        if settings.vector_index_type not in INDEX_TYPES:
+            raise VectorStoreError(
+                f"Unknown vector index type '{settings.vector_index_type}', expected one of {', '.join(INDEX_TYPES)}"
+            )
+        return cls(
+            type=settings.vector_index_type,
+            hnsw_m=settings.vector_index_hnsw_m,
+            hnsw_ef_construction=settings.vector_index_hnsw_ef_construction,
+            hnsw_ef_search=settings.vector_index_hnsw_ef_search,
+            ivf_nlist=settings.vector_index_ivf_nlist,
+            ivf_nprobe=settings.vector_index_ivf_nprobe,
+            pq_m=settings.vector_index_pq_m,
+            pq_nbits=settings.vector_index_pq_nbits
+        )
+
+    @property
+    def factory(self) -> str:
+        """Get the ``faiss.index_factory`` description of the index."""
+        if self.type == "hnsw":
+            return f"HNSW{self.hnsw_m}"
+        if self.type == "ivfpq":
+            return f"IVF{self.ivf_nlist},PQ{self.pq_m}x{self.pq_nbits}"
+        return "Flat"
+
+    def build_params(self) -> dict:
+        """Get the parameters baked into the stored index, recorded in the manifest."""
+        params = asdict(self)
+        del params["hnsw_ef_search"], params["ivf_nprobe"]
+        return params
+
+    def min_training_size(self) -> int:
+        """Get the number of vectors needed to train the index."""
+        if self.type == "ivfpq":
+            return max(self.ivf_nlist, 2 ** self.pq_nbits)
+        return 0
+
+
+def create_index(spec: IndexSpec, vectors: np.ndarray) -> tuple[faiss.Index, IndexSpec]:
+    """Create an empty index for ``vectors``, training it if the type needs it.
+
+    Falls back to a flat index when there are too few vectors to train, and
+    returns the spec actually used.
+    """
+    dimension = vectors.shape[1]
+    if len(vectors) < spec.min_training_size():
+        logger.warning(
+            f"{len(vectors)} vectors are too few to train a {spec.factory} index "
+            f"(need {spec.min_training_size()}), using a flat index"
+        )
+        spec = IndexSpec(type="flat")
+    if spec.type == "ivfpq" and dimension % spec.pq_m:
+        raise VectorStoreError(f"VECTOR_INDEX_PQ_M={spec.pq_m} must divide the embedding dimension {dimension}")
+
+    index = faiss.index_factory(dimension, spec.factory)
+    if spec.type == "hnsw":
+        index.hnsw.efConstruction = spec.hnsw_ef_construction
+    if not index.is_trained:
+        start = time.perf_counter()
+        index.train(vectors)
+        logger.info(f"Trained {spec.factory} index on {len(vectors)} vectors in {time.perf_counter() - start:.2f}s")
+    apply_search_params(index, spec)
+    return index, spec
+
+
+def apply_search_params(index: faiss.Index, spec: IndexSpec):
+    """Set the search-time parameters of ``spec`` on a built or loaded index."""
+    parameters = faiss.ParameterSpace()
+    if isinstance(index, faiss.IndexHNSW):
+        parameters.set_index_parameter(index, "efSearch", spec.hnsw_ef_search)
+    elif isinstance(index, faiss.IndexIVF):
+        parameters.set_index_parameter(index, "nprobe", spec.ivf_nprobe)
+
+
+def evaluate_index(index: faiss.Index, vectors: np.ndarray, k: int, max_queries: int = 200) -> dict:
+    """Measure recall@k and search latency of ``index`` against exact search.
+
+    The indexed vectors themselves (up to ``max_queries``) serve as queries.
+    """
+    queries = vectors[np.linspace(0, len(vectors) - 1, min(len(vectors), max_queries)).astype(int)]
+    k = min(k, len(vectors))
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+
+    start = time.perf_counter()
+    _, expected = exact.search(queries, k)
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    start = time.perf_counter()
+    _, found = index.search(queries, k)
+    index_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    recall = np.mean([len(set(e) & set(f)) / k for e, f in zip(expected, found)])
+    return {
+        "queries": len(queries),
+        "k": k,
+        f"recall_at_{k}": round(float(recall), 4),
+        "latency_ms_per_query": round(index_ms, 4),
+        "exact_latency_ms_per_query": round(exact_ms, 4)
+    }
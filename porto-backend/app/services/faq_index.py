@@ -0,0 +1,122 @@
+"""Exact and near-duplicate lookup of curated FAQ questions."""
+import logging
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from app.core.text import normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+def _question_key(text: str) -> str:
+    """Normalize a question for exact matching, ignoring trailing punctuation."""
+    return normalize_query(text).rstrip("?!.… ")
+
+
+def embed_texts(ids: list[str], texts: list[str], embeddings: Embeddings, cache_path: Optional[str] = None) -> np.ndarray:
+    """Embed texts as unit vectors, reusing vectors cached in ``cache_path`` by id."""
+    model = getattr(embeddings, "model", None) or type(embeddings).__name__
+    cached: dict[str, np.ndarray] = {}
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with np.load(cache_path) as data:
+                if str(data["model"]) == model:
+                    cached = dict(zip(data["ids"].tolist(), data["vectors"]))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable vector cache {cache_path}: {e}")
+
+    missing = [i for i, text_id in enumerate(ids) if text_id not in cached]
+    if missing:
+        for i, vector in zip(missing, embeddings.embed_documents([texts[i] for i in missing])):
+            cached[ids[i]] = np.asarray(vector, dtype=np.float32)
+        if cache_path:
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp.npz"
+            np.savez(tmp_path, model=model, ids=np.array(ids), vectors=np.stack([cached[text_id] for text_id in ids]))
+            os.replace(tmp_path, cache_path)
+
+    vectors = np.stack([cached[text_id] for text_id in ids]).astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+@dataclass
+class FAQMatch:
+    """FAQ entry matched by a user message."""
+    question: str
+    answer: str
+    match: str
+    score: float
+
+
+class FAQIndex:
+    """Immutable lookup of FAQ answers by question.
+
+    Messages are matched exactly on the normalized question first. With a
+    ``threshold`` below 1, the message embedding is compared against the
+    precomputed question embeddings and the best question above the threshold
+    wins. Question embeddings are cached per entry id in ``cache_path``.
+    """
+
+    def __init__(self, questions: list[str], answers: list[str], vectors: Optional[np.ndarray], embeddings: Embeddings, threshold: float):
+        self.questions = questions
+        self.answers = answers
+        self.vectors = vectors
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self._exact = {_question_key(q): i for i, q in enumerate(questions)}
+
+    @classmethod
+    def build(cls, docs: dict[str, Document], embeddings: Embeddings, threshold: float, cache_path: Optional[str] = None) -> "FAQIndex":
+        """Build the index from the payload metadata of knowledge base documents keyed by entry id."""
+        ids, questions, answers = [], [], []
+        for entry_id, doc in docs.items():
+            if doc.metadata.get("question") and doc.metadata.get("answer"):
+                ids.append(entry_id)
+                questions.append(doc.metadata["question"])
+                answers.append(doc.metadata["answer"])
+
+        vectors = None
+        if threshold < 1 and questions:
+            vectors = embed_texts(ids, questions, embeddings, cache_path)
+        logger.info(f"FAQ index built with {len(questions)} questions")
+        return cls(questions, answers, vectors, embeddings, threshold)
+
+    def _result(self, i: int, match: str, score: float) -> FAQMatch:
+        return FAQMatch(question=self.questions[i], answer=self.answers[i], match=match, score=score)
+
+    def _nearest(self, vector: list[float]) -> Optional[FAQMatch]:
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+        scores = self.vectors @ (query / norm)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        return self._result(best, "similar", float(scores[best]))
+
+    def match(self, message: str) -> Optional[FAQMatch]:
+        """Find the FAQ entry answering ``message``, if any."""
+        i = self._exact.get(_question_key(message))
+        if i is not None:
+            return self._result(i, "exact", 1.0)
+        if self.vectors is None:
+            return None
+        return self._nearest(self.embeddings.embed_query(message))
+
+    async def amatch(self, message: str) -> Optional[FAQMatch]:
+        """Async version of ``match``."""
+        i = self._exact.get(_question_key(message))
+        if i is not None:
+            return self._result(i, "exact", 1.0)
+        if self.vectors is None:
+            return None
+        return self._nearest(await self.embeddings.aembed_query(message))
+
+    def __len__(self) -> int:
+        return len(self.questions)
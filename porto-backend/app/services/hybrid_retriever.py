@@ -0,0 +1,95 @@
+"""Hybrid lexical + dense retrieval with reciprocal rank fusion."""
+import logging
+from typing import Any, Optional
+
+from langchain_core.documents import Document
+
+from app.services.lexical_index import BM25Index
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_MODES = ("hybrid", "dense", "lexical")
+
+
+class HybridRetriever:
+    """Retrieves from a vector store and a BM25 index as one immutable unit.
+
+    In ``hybrid`` mode a decisive lexical result (top BM25 score at least
+    ``min_score`` and ``decisive_ratio`` times the runner-up, or above 0 if
+    there is none) is returned without an embedding
+    call; otherwise dense and lexical rankings are fused by reciprocal rank. If
+    the dense search fails, lexical results are returned instead.
+    """
+
+    def __init__(
+        self,
+        vector_store: Any,
+        lexical_index: Optional[BM25Index] = None,
+        mode: str = "hybrid",
+        rrf_k: int = 60,
+        decisive_ratio: float = 2.0,
+        min_score: float = 5.0,
+        generation: int = 0
+    ):
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{mode}', expected one of {', '.join(RETRIEVAL_MODES)}")
+        self.vector_store = vector_store
+        self.lexical_index = lexical_index
+        self.mode = mode if lexical_index is not None else "dense"
+        self.rrf_k = rrf_k
+        self.decisive_ratio = decisive_ratio
+        self.min_score = min_score
+        # Identifies the knowledge snapshot, e.g. to key coalesced searches.
+        self.generation = generation
+
+    def _lexical(self, query: str, k: int, category: Optional[str]) -> list[tuple[Document, float]]:
+        return self.lexical_index.search(query, k * 2, category=category)
+
+    def _is_decisive(self, lexical: list[tuple[Document, float]]) -> bool:
+        # A single weak hit (e.g. one stray token) must not skip dense retrieval.
+        if not lexical or lexical[0][1] < self.min_score:
+            return False
+        runner_up = lexical[1][1] if len(lexical) > 1 else 0.0
+        return lexical[0][1] >= self.decisive_ratio * runner_up
+
+    def _fuse(self, dense: list[Document], lexical: list[tuple[Document, float]], k: int) -> list[Document]:
+        scores: dict[str, float] = {}
+        docs: dict[str, Document] = {}
+        for ranking in (dense, [doc for doc, _ in lexical]):
+            for rank, doc in enumerate(ranking):
+                key = doc.id or doc.page_content
+                docs[key] = doc
+                scores[key] = scores.get(key, 0.0) + 1 / (self.rrf_k + rank + 1)
+        return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)[:k]]
+
+    @staticmethod
+    def _filter(category: Optional[str]) -> Optional[dict]:
+        return {"category": category} if category else None
+
+    def search(self, query: str, k: int, category: Optional[str] = None) -> tuple[list[Document], str]:
+        """Retrieve ``k`` documents; also returns the path taken for metrics."""
+        if self.mode == "dense":
+            return self.vector_store.similarity_search(query, k=k, filter=self._filter(category)), "dense"
+        lexical = self._lexical(query, k, category)
+        if self.mode == "lexical" or self._is_decisive(lexical):
+            return [doc for doc, _ in lexical[:k]], "lexical"
+        try:
+            dense = self.vector_store.similarity_search(query, k=k * 2, filter=self._filter(category))
+        except Exception as e:
+            logger.warning(f"Dense retrieval failed, using lexical results: {e}")
+            return [doc for doc, _ in lexical[:k]], "lexical_fallback"
+        return self._fuse(dense, lexical, k), "hybrid"
+
+    async def asearch(self, query: str, k: int, category: Optional[str] = None) -> tuple[list[Document], str]:
+        """Async version of ``search``."""
+        if self.mode == "dense":
+            return await self.vector_store.asimilarity_search(query, k=k, filter=self._filter(category)), "dense"
+        lexical = self._lexical(query, k, category)
+        if self.mode == "lexical" or self._is_decisive(lexical):
+            return [doc for doc, _ in lexical[:k]], "lexical"
+        try:
+            dense = await self.vector_store.asimilarity_search(query, k=k * 2, filter=self._filter(category))
+        except Exception as e:
+            logger.warning(f"Dense retrieval failed, using lexical results: {e}")
+            return [doc for doc, _ in lexical[:k]], "lexical_fallback"
+        return self._fuse(dense, lexical, k), "hybrid"
@@ -0,0 +1,101 @@
+"""Background rebuild and hot swap of the knowledge base index."""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from app.core.constants import DATABASE_PATH
+from app.core.metrics import KNOWLEDGE_RELOADS
+from app.services.vector_store_service import VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+
+class KnowledgeReloader:
+    """Rebuilds the knowledge indexes off the event loop and swaps them in atomically.
+
+    ``load`` builds fresh index objects in a worker thread; the live ones are
+    never mutated. ``on_swap`` then replaces the references, so in-flight
+    retrievals finish on the indexes they started with. Each worker process
+    holds its own indexes and reloader; a reload only swaps the calling
+    process's indexes, which is why results carry the pid and generation.
+    """
+
+    def __init__(self, load: Callable[[], Any], on_swap: Callable[[Any], None], path: str = DATABASE_PATH):
+        self.load = load
+        self.on_swap = on_swap
+        self.path = path
+        self._lock = asyncio.Lock()
+        self._fingerprint = VectorStoreService.file_fingerprint(path)
+        self._mtime = self._stat()
+        self.reloads = 0
+        self.last_reload_at: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    def _stat(self) -> Optional[tuple[float, int]]:
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    async def reload(self, force: bool = False) -> dict:
+        """Rebuild the index if the knowledge base changed and swap it in."""
+        async with self._lock:
+            start_time = time.time()
+            try:
+                self._mtime = self._stat()
+                fingerprint = await asyncio.to_thread(VectorStoreService.file_fingerprint, self.path)
+                if fingerprint == self._fingerprint and not force:
+                    return {"status": "unchanged", "source_sha256": fingerprint, **self._scope()}
+
+                knowledge = await asyncio.to_thread(self.load)
+                self.on_swap(knowledge)
+                self._fingerprint = fingerprint
+                self.reloads += 1
+                KNOWLEDGE_RELOADS.inc(outcome="success")
+                self.last_reload_at = datetime.now().isoformat()
+                self.last_error = None
+                duration_ms = (time.time() - start_time) * 1000
+                logger.info(f"Knowledge base reloaded in {duration_ms:.0f}ms")
+                return {
+                    "status": "reloaded",
+                    "source_sha256": fingerprint,
+                    "duration_ms": duration_ms,
+                    **self._scope()
+                }
+            except Exception as e:
+                self.last_error = str(e)
+                KNOWLEDGE_RELOADS.inc(outcome="error")
+                logger.error(f"Knowledge base reload failed, keeping current index: {e}")
+                raise
+
+    def _scope(self) -> dict:
+        """Identify the process whose indexes a result refers to."""
+        return {"scope": "process", "pid": os.getpid(), "generation": self.reloads}
+
+    async def watch(self, interval_seconds: float):
+        """Poll the knowledge base file and reload when it changes."""
+        logger.info(f"Watching {self.path} for changes every {interval_seconds}s")
+        while True:
+            await asyncio.sleep(interval_seconds)
+            if self._stat() == self._mtime or self._lock.locked():
+                continue
+            try:
+                await self.reload()
+            except Exception:
+                # Already logged; the next change to the file retries.
+                pass
+
+    def get_stats(self) -> dict:
+        """Get reload counters and the current knowledge base fingerprint."""
+        return {
+            "source_sha256": self._fingerprint,
+            "reloads": self.reloads,
+            "last_reload_at": self.last_reload_at,
+            "last_error": self.last_error,
+            "reloading": self._lock.locked(),
+            "generation": self.reloads
+        }
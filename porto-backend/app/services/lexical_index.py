@@ -0,0 +1,64 @@
+"""In-memory BM25 index over the knowledge base documents."""
+import math
+import re
+from collections import Counter
+from typing import Optional
+
+from langchain_core.documents import Document
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into casefolded word tokens."""
+    return _TOKEN.findall(text.casefold())
+
+
+def _document_text(doc: Document) -> str:
+    metadata = doc.metadata
+    if metadata.get("answer"):
+        return " ".join(str(metadata.get(field) or "") for field in ("question", "answer", "category"))
+    return doc.page_content
+
+
+class BM25Index:
+    """Okapi BM25 over question, answer and category of each document.
+
+    Built once per knowledge base version and never mutated, so it can be
+    swapped together with the vector store.
+    """
+
+    def __init__(self, docs: list[Document], k1: float = 1.5, b: float = 0.75):
+        self.docs = docs
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._lengths: list[int] = []
+        for i, doc in enumerate(docs):
+            counts = Counter(tokenize(_document_text(doc)))
+            self._lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._postings.setdefault(term, []).append((i, tf))
+        self._avg_length = sum(self._lengths) / len(docs) if docs else 0.0
+        self._idf = {
+            term: math.log(1 + (len(docs) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def search(self, query: str, k: int, category: Optional[str] = None) -> list[tuple[Document, float]]:
+        """Return up to ``k`` documents with a positive BM25 score, best first."""
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self._postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / self._avg_length)
+                scores[i] = scores.get(i, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if category:
+            ranked = [(i, score) for i, score in ranked if self.docs[i].metadata.get("category") == category]
+        return [(self.docs[i], score) for i, score in ranked[:k]]
+
+    def __len__(self) -> int:
+        return len(self.docs)
@@ -1,69 +1,211 @@
+import copy
+from contextlib import AbstractContextManager, contextmanager, nullcontext
 import logging
+import os
+import time
 import uuid
-from typing import Optional
+from typing import Optional, AsyncIterator, Any, Callable, Iterator, NamedTuple
 
 from langchain.agents import create_agent
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from groq import RateLimitError
 from langchain_groq import ChatGroq
-from langgraph.checkpoint.memory import InMemorySaver
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
 from app.core.prompts import SYSTEM_PROMPT
-from app.core.constants import DEFAULT_MODEL, DEFAULT_TEMPERATURE
-from app.core.exceptions import LLMServiceError
+from app.core.constants import DEFAULT_MODEL, DEFAULT_TEMPERATURE, INDEX_PATH, FAQ_VECTORS_FILE, ROUTER_VECTORS_FILE
+from app.core.exceptions import ChatbotException, LLMServiceError, ValidationError, ContextLengthError, UpstreamRateLimitError
+from app.core.settings import get_settings
+from app.core.metrics import (
+    AGENT_INVOCATIONS,
+    AGENT_INVOCATION_DURATION,
+    CACHE_ENTRIES,
+    CHECKPOINTER_THREADS,
+    COALESCING_IN_FLIGHT,
+    KNOWLEDGE_BASE_DOCUMENTS,
+    MESSAGE_PARSE_DURATION,
+    PROCESS_RESIDENT_MEMORY,
+    timed
+)
+from app.core.process import rss_bytes
+from app.core.singleflight import SingleFlight
+from app.core.text import normalize_query
+from app.core.tracing import start_span
 from app.services.tool_manager import ToolManager
 from app.services.vector_store_service import VectorStoreService
 from app.services.message_parser import MessageParser
-from app.services.debug_service import DebugService
+from app.services.debug_service import DebugService, debug_trace
+from app.services.agent_pool import AgentPool
+from app.services.checkpointer import create_checkpointer
+from app.services.context_policy import ContextPolicy
+from app.services.model_metrics import ModelCallMetrics
+from app.services.knowledge_reloader import KnowledgeReloader
+from app.services.lexical_index import BM25Index
+from app.services.faq_index import FAQIndex, FAQMatch
+from app.services.response_cache import SemanticResponseCache, CachedResponse
+from app.services.tool_router import ToolRouter, ToolRoute, HeuristicToolRouter
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
 
+def _find_rate_limit(e: BaseException) -> Optional[UpstreamRateLimitError]:
+    """Find a Groq or Tavily rate limit in the exception chain, e.g. behind a failed tool call."""
+    seen = set()
+    while e is not None and id(e) not in seen:
+        seen.add(id(e))
+        if isinstance(e, UpstreamRateLimitError):
+            return UpstreamRateLimitError(str(e), e.retry_after)
+        if isinstance(e, RateLimitError):
+            try:
+                retry_after = float(e.response.headers.get("retry-after"))
+            except (TypeError, ValueError):
+                retry_after = None
+            return UpstreamRateLimitError(f"Groq rate limit reached: {e}", retry_after)
+        e = e.__cause__ or e.__context__
+    return None
+
+
 class Context(BaseModel):
     """Context schema for agent conversations."""
     user_id: Optional[str] = Field(default=None, description="User identifier")
     session_id: Optional[str] = Field(default=None, description="Session identifier")
 
 
+class Knowledge(NamedTuple):
+    """Indexes built from the knowledge base and swapped together on reload."""
+    vector_store: Any
+    lexical_index: Optional[BM25Index]
+    faq_index: Optional[FAQIndex]
+    tool_router: Optional[ToolRouter]
+
+
 class LLMService:
-    """Service for LLM agent interactions."""
+    """Service for LLM agent interactions.
+
+    The chat model factory, embeddings and tool manager can be injected, e.g.
+    to run the offline benchmarks without Groq, OpenAI or Tavily.
+    """
     
-    def __init__(self):
+    def __init__(
+        self,
+        chat_model_factory: Optional[Callable[[str], BaseChatModel]] = None,
+        embeddings: Optional[Embeddings] = None,
+        tool_manager: Optional[ToolManager] = None
+    ):
         try:
-            self.vector_store = VectorStoreService.initialize()
-            self.tool_manager = ToolManager()
-            self.tool_manager.set_vector_store(self.vector_store)
+            settings = get_settings()
+            self.settings = settings
+            self._chat_model_factory = chat_model_factory or (
+                lambda model: ChatGroq(model=model, temperature=DEFAULT_TEMPERATURE)
+            )
+            self.embeddings = embeddings if embeddings is not None else VectorStoreService.create_embeddings()
+            self.tool_manager = tool_manager or ToolManager()
+            self.response_cache = SemanticResponseCache(
+                self.embeddings,
+                threshold=settings.response_cache_threshold,
+                max_size=settings.response_cache_size,
+                ttl_seconds=settings.response_cache_ttl_seconds
+            ) if settings.response_cache_enabled else None
+            self.set_knowledge(self._load_knowledge())
+            self.knowledge_reloader = KnowledgeReloader(self._load_knowledge, on_swap=self.set_knowledge)
+            self._agent_flights: Optional[SingleFlight[tuple]] = (
+                SingleFlight(timeout_seconds=settings.coalescing_timeout_seconds, name="agent") if settings.coalescing_enabled else None
+            )
             
-            self.current_model = DEFAULT_MODEL
-            self.llm = ChatGroq(model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE)
-            self.checkpointer = InMemorySaver()
+            self.allowed_models = settings.allowed_models_list
+            self.checkpointer = create_checkpointer(settings)
             self.message_parser = MessageParser()
-            self.debug_service = DebugService()
-            self.agent = self._create_agent()
-            self._last_debug_mode = False
+            self.agent_pool = AgentPool(self._create_agent, max_size=settings.agent_pool_size)
+            self.agent_pool.get(DEFAULT_MODEL)
             logger.info("LLM service initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing LLM service: {str(e)}")
             raise LLMServiceError(f"Failed to initialize LLM service: {str(e)}") from e
 
-    def _create_agent(self, debug_mode: bool = False):
+    def _load_knowledge(self) -> Knowledge:
+        """Build the vector store and the optional lexical index, FAQ index and tool router."""
+        vector_store = VectorStoreService.initialize(self.embeddings)
+        lexical_index = None
+        if self.settings.retrieval_mode != "dense":
+            lexical_index = VectorStoreService.build_lexical_index(vector_store)
+        faq_index = tool_router = None
+        if self.settings.faq_fast_path or self.settings.tool_router_enabled:
+            docs = VectorStoreService.load_documents()
+            if self.settings.faq_fast_path:
+                faq_index = FAQIndex.build(
+                    docs,
+                    self.embeddings,
+                    threshold=self.settings.faq_similarity_threshold,
+                    cache_path=os.path.join(INDEX_PATH, FAQ_VECTORS_FILE)
+                )
+            if self.settings.tool_router_enabled:
+                tool_router = HeuristicToolRouter.build(
+                    docs,
+                    self.embeddings,
+                    margin=self.settings.tool_router_margin,
+                    min_similarity=self.settings.tool_router_min_similarity,
+                    keywords=self.settings.tool_router_keywords_list,
+                    cache_path=os.path.join(INDEX_PATH, ROUTER_VECTORS_FILE)
+                )
+        return Knowledge(vector_store, lexical_index, faq_index, tool_router)
+
+    def set_knowledge(self, knowledge: Knowledge):
+        """Swap in rebuilt knowledge indexes for all subsequent requests.
+
+        Cached responses were built from the previous knowledge, so they are dropped.
+        """
+        self.vector_store, self.lexical_index, self.faq_index, self.tool_router = knowledge
+        self.tool_manager.set_vector_store(self.vector_store, self.lexical_index)
+        if self.response_cache is not None:
+            self.response_cache.invalidate()
+
+    def _create_agent(self, model: str = DEFAULT_MODEL):
         """Create LangChain agent with tools."""
         try:
-            tools = self.tool_manager.create_langchain_tools(debug_mode=debug_mode, debug_service=self.debug_service if debug_mode else None)
+            llm = self._chat_model_factory(model)
+            tools = self.tool_manager.create_langchain_tools()
+            context_policy = ContextPolicy(
+                max_tokens=self.settings.context_model_token_budgets_map.get(model, self.settings.context_max_tokens),
+                summarizer=llm if self.settings.context_summarization else None,
+                tool_result_max_chars=self.settings.context_tool_result_max_chars
+            )
             agent = create_agent(
-                model=self.llm,
+                model=llm,
                 tools=tools,
                 context_schema=Context,
                 system_prompt=SYSTEM_PROMPT,
+                middleware=[context_policy, ModelCallMetrics(model)],
                 checkpointer=self.checkpointer
             )
-            logger.info(f"Agent created successfully with {len(tools)} tools")
+            logger.info(f"Agent created successfully for {model} with {len(tools)} tools")
             return agent
         except Exception as e:
             logger.error(f"Error creating agent: {str(e)}")
             raise LLMServiceError(f"Failed to create agent: {str(e)}") from e
 
+    @staticmethod
+    @contextmanager
+    def _observe_invocation(model: str, thread_id: str) -> Iterator[dict]:
+        """Count, time and trace one chat turn; callers set ``path`` to how it was answered."""
+        labels = {"model": model, "path": "agent"}
+        start_time = time.perf_counter()
+        outcome = "success"
+        with start_span("agent.turn", model=model, thread_id=thread_id) as span:
+            try:
+                yield labels
+            except Exception:
+                outcome = "error"
+                raise
+            finally:
+                AGENT_INVOCATIONS.inc(outcome=outcome, **labels)
+                AGENT_INVOCATION_DURATION.observe(time.perf_counter() - start_time, **labels)
+                if span is not None:
+                    span.set_attribute("path", labels["path"])
+
     @staticmethod
     def _get_or_create_thread_id(thread_id: Optional[str] = None) -> str:
         """Get existing thread ID or create a new one."""
@@ -79,52 +221,459 @@ class LLMService:
             pass
         return 0
 
+    async def _aget_messages_before_count(self, config: dict) -> int:
+        """Async version of ``_get_messages_before_count``."""
+        try:
+            state = await self.checkpointer.aget(config)
+            if isinstance(state, dict):
+                return len(state.get("channel_values", {}).get("messages", []))
+        except Exception:
+            pass
+        return 0
+
+    def _get_agent(self, model: Optional[str] = None):
+        """Pick the pooled agent for the requested model."""
+        model = model or DEFAULT_MODEL
+        if "*" not in self.allowed_models and model not in self.allowed_models:
+            raise ValidationError(f"Model '{model}' is not allowed")
+        return self.agent_pool.get(model)
+
+    @staticmethod
+    def _wrap_error(e: Exception) -> ChatbotException:
+        """Map an agent failure to the matching service exception."""
+        rate_limit = _find_rate_limit(e)
+        if rate_limit is not None:
+            return rate_limit
+        message = str(e)
+        if any(marker in message.lower() for marker in ("context_length_exceeded", "context length", "request too large", "reduce the length")):
+            return ContextLengthError(f"Conversation exceeds the model context: {message}")
+        return LLMServiceError(f"Failed to process query: {message}")
+
+    def _build_result(self, result: Any, thread_id: str, trace: Optional[DebugService] = None) -> tuple[str, str, list[dict], Optional[dict]]:
+        """Extract answer, tool calls and debug info from the final agent state."""
+        if trace:
+            trace.track_agent_response(result)
+        
+        with start_span("message_parser.extract"), timed(MESSAGE_PARSE_DURATION):
+            answer = self.message_parser.extract_message_content(result)
+            # The context policy may rewrite earlier history, so locate the turn in the result.
+            tool_calls = self.message_parser.extract_tool_calls(
+                result,
+                self.message_parser.find_turn_start(result),
+                tool_schema_getter=self.tool_manager.get_tool_schema
+            )
+        
+        if trace:
+            trace.track_model_response(answer)
+        
+        debug_info = trace.get_debug_info() if trace else None
+        return answer, thread_id, tool_calls, debug_info
+
+    async def _amatch_faq(self, query: str) -> Optional[FAQMatch]:
+        """Look up the message in the FAQ index; lookup failures fall back to the agent."""
+        faq_index = self.faq_index
+        if faq_index is None:
+            return None
+        try:
+            return await faq_index.amatch(query)
+        except Exception as e:
+            logger.warning(f"FAQ lookup failed, falling back to the agent: {e}")
+            return None
+
+    def _match_faq(self, query: str) -> Optional[FAQMatch]:
+        """Sync version of ``_amatch_faq``."""
+        faq_index = self.faq_index
+        if faq_index is None:
+            return None
+        try:
+            return faq_index.match(query)
+        except Exception as e:
+            logger.warning(f"FAQ lookup failed, falling back to the agent: {e}")
+            return None
+
+    @staticmethod
+    def _faq_turn(query: str, faq_match: FAQMatch) -> list:
+        """Build the thread messages recording a FAQ answer as a cached retrieval.
+        
+        The call keeps to the tool schema, as later turns replay it to the model.
+        """
+        call_id = f"faq_{uuid.uuid4().hex[:16]}"
+        return [
+            HumanMessage(content=query),
+            AIMessage(content="", tool_calls=[{"name": "retriever_tool", "args": {"query": query}, "id": call_id}]),
+            ToolMessage(content=faq_match.answer, tool_call_id=call_id, name="retriever_tool"),
+            AIMessage(content=faq_match.answer)
+        ]
+
+    @staticmethod
+    def _mark_faq_hit(tool_calls: list[dict], faq_match: FAQMatch) -> list[dict]:
+        """Flag the returned tool calls of a FAQ turn as answered by the FAQ index."""
+        for tool_call in tool_calls:
+            tool_call["cache_hit"] = {"match": faq_match.match, "score": round(faq_match.score, 4)}
+        return tool_calls
+
+    @staticmethod
+    def _track_recorded_tools(messages: list, trace: Optional[DebugService], start_time: float):
+        """Report tool results of a recorded turn to the debug trace."""
+        if not trace:
+            return
+        args_by_id = {tc["id"]: tc["args"] for m in messages if isinstance(m, AIMessage) for tc in m.tool_calls}
+        for message in messages:
+            if isinstance(message, ToolMessage):
+                trace.track_tool_execution(
+                    tool_name=message.name,
+                    args=args_by_id.get(message.tool_call_id, {}),
+                    result=message.content,
+                    execution_time_ms=(time.time() - start_time) * 1000
+                )
+
+    def _record_turn(self, agent: Any, config: dict, messages: list, trace: Optional[DebugService] = None) -> dict:
+        """Append a turn answered without running the model to the thread."""
+        start_time = time.time()
+        agent.update_state(config, {"messages": messages}, as_node="model")
+        self._track_recorded_tools(messages, trace, start_time)
+        return agent.get_state(config).values
+
+    async def _arecord_turn(self, agent: Any, config: dict, messages: list, trace: Optional[DebugService] = None) -> dict:
+        """Async version of ``_record_turn``."""
+        start_time = time.time()
+        await agent.aupdate_state(config, {"messages": messages}, as_node="model")
+        self._track_recorded_tools(messages, trace, start_time)
+        return (await agent.aget_state(config)).values
+
+    @staticmethod
+    def _answer_turn(query: str, answer: str) -> list:
+        """Build the thread messages recording an answer produced elsewhere."""
+        return [HumanMessage(content=query), AIMessage(content=answer)]
+
+    def _is_first_turn(self, config: dict, new_thread: bool, debug_mode: bool) -> bool:
+        """Check whether the message opens a conversation and may be cached or coalesced."""
+        if debug_mode or (self.response_cache is None and self._agent_flights is None):
+            return False
+        return new_thread or self._get_messages_before_count(config) == 0
+
+    async def _ais_first_turn(self, config: dict, new_thread: bool, debug_mode: bool) -> bool:
+        """Async version of ``_is_first_turn``."""
+        if debug_mode or (self.response_cache is None and self._agent_flights is None):
+            return False
+        return new_thread or await self._aget_messages_before_count(config) == 0
+
+    def _lookup_response(self, model: str, query: str, first_turn: bool) -> tuple[Optional[CachedResponse], Any]:
+        """Look up a first-turn message in the response cache.
+
+        Returns the cached response (if any) and the message embedding to store
+        the fresh response under; both are None when the cache does not apply.
+        """
+        if self.response_cache is None or not first_turn:
+            return None, None
+        try:
+            return self.response_cache.lookup(model, query)
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            return None, None
+
+    async def _alookup_response(self, model: str, query: str, first_turn: bool) -> tuple[Optional[CachedResponse], Any]:
+        """Async version of ``_lookup_response``."""
+        if self.response_cache is None or not first_turn:
+            return None, None
+        try:
+            return await self.response_cache.alookup(model, query)
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            return None, None
+
+    def _store_response(self, model: str, query: str, vector: Any, response: tuple, start_time: float):
+        """Cache a fresh first-turn response looked up by ``_lookup_response``."""
+        if vector is None:
+            return
+        answer, _, tool_calls, _ = response
+        self.response_cache.store(
+            model, query, vector, answer, copy.deepcopy(tool_calls), (time.time() - start_time) * 1000, started_at=start_time
+        )
+
+    def _routed_messages(self, query: str, route: Optional[ToolRoute], result: Optional[str]) -> list:
+        """Build the agent input with the pre-routed tool call and its result."""
+        messages = [HumanMessage(content=query)]
+        if route is not None and result is not None:
+            call_id = f"route_{uuid.uuid4().hex[:16]}"
+            messages += [
+                AIMessage(content="", tool_calls=[{"name": route.tool, "args": route.args, "id": call_id}]),
+                ToolMessage(content=result, tool_call_id=call_id, name=route.tool)
+            ]
+        return messages
+
+    def _speculate(self, agent_input: dict, query: str) -> AbstractContextManager:
+        """Prefetch retrieval for the raw message while the model picks a tool (opt-in, async only)."""
+        if not self.settings.speculative_retrieval or len(agent_input["messages"]) > 1:
+            return nullcontext()
+        return self.tool_manager.speculative_retrieval(query)
+
+    def _route_input(self, query: str) -> dict:
+        """Run the tool picked by the router up front, so the agent can answer in one model call.
+
+        The tool runs through the tracked implementations, so it is counted,
+        timed and traced (and reported to the debug trace) like an agent tool call.
+        """
+        route = result = None
+        if self.tool_router is not None:
+            try:
+                route = self.tool_router.route(query)
+                if route is not None:
+                    result = self.tool_manager.run_tool(route.tool, route.args)
+            except Exception as e:
+                logger.warning(f"Tool pre-routing failed, letting the agent choose: {e}")
+        return {"messages": self._routed_messages(query, route, result)}
+
+    async def _aroute_input(self, query: str) -> dict:
+        """Async version of ``_route_input``."""
+        route = result = None
+        if self.tool_router is not None:
+            try:
+                route = await self.tool_router.aroute(query)
+                if route is not None:
+                    result = await self.tool_manager.arun_tool(route.tool, route.args)
+            except Exception as e:
+                logger.warning(f"Tool pre-routing failed, letting the agent choose: {e}")
+        return {"messages": self._routed_messages(query, route, result)}
+
     def invoke(self, query: str, thread_id: Optional[str] = None, debug_mode: bool = False, model: Optional[str] = None) -> tuple[str, str, list[dict], Optional[dict]]:
         """Invoke the agent with a query."""
         try:
-            if debug_mode:
-                self.debug_service.enable()
-                self.debug_service.reset()
-            else:
-                self.debug_service.disable()
-            
-            # Update LLM if model is provided and different from current
-            if model and model != self.current_model:
-                self.current_model = model
-                self.llm = ChatGroq(model=model, temperature=DEFAULT_TEMPERATURE)
-                # Recreate agent with new model
-                self.agent = self._create_agent(debug_mode=debug_mode)
-                logger.info(f"Switched to model: {model}")
-            
-            if debug_mode != self._last_debug_mode:
-                self.agent = self._create_agent(debug_mode=debug_mode)
-                self._last_debug_mode = debug_mode
+            agent = self._get_agent(model)
+            model = model or DEFAULT_MODEL
             
+            new_thread = not thread_id
             thread_id = self._get_or_create_thread_id(thread_id)
             config = {"configurable": {"thread_id": thread_id}}
-            messages_before = self._get_messages_before_count(config)
-            
-            result = self.agent.invoke(
-                {"messages": [{"role": "user", "content": query}]},
-                config=config
-            )
-            
-            if debug_mode:
-                self.debug_service.track_agent_response(result)
-            
-            answer = self.message_parser.extract_message_content(result)
+            with debug_trace(debug_mode) as trace, self._observe_invocation(model, thread_id) as invocation:
+                faq_match = self._match_faq(query)
+                if faq_match is not None:
+                    invocation["path"] = "faq"
+                    result = self._record_turn(agent, config, self._faq_turn(query, faq_match), trace)
+                    answer, thread_id, tool_calls, debug_info = self._build_result(result, thread_id, trace)
+                    return answer, thread_id, self._mark_faq_hit(tool_calls, faq_match), debug_info
+                
+                first_turn = self._is_first_turn(config, new_thread, debug_mode)
+                cached, vector = self._lookup_response(model, query, first_turn)
+                if cached is not None:
+                    invocation["path"] = "response_cache"
+                    self._record_turn(agent, config, self._answer_turn(query, cached.answer))
+                    return cached.answer, thread_id, copy.deepcopy(cached.tool_calls), None
+                
+                start_time = time.time()
+                result = agent.invoke(self._route_input(query), config=config)
+                response = self._build_result(result, thread_id, trace)
+                self._store_response(model, query, vector, response, start_time)
+                return response
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error invoking agent: {str(e)}")
+            raise self._wrap_error(e) from e
+
+    async def ainvoke(self, query: str, thread_id: Optional[str] = None, debug_mode: bool = False, model: Optional[str] = None) -> tuple[str, str, list[dict], Optional[dict]]:
+        """Async version of ``invoke``; awaits the agent without holding a worker thread."""
+        try:
+            agent = self._get_agent(model)
+            model = model or DEFAULT_MODEL
             
-            if debug_mode:
-                self.debug_service.track_model_response(answer)
+            new_thread = not thread_id
+            thread_id = self._get_or_create_thread_id(thread_id)
+            config = {"configurable": {"thread_id": thread_id}}
+            with debug_trace(debug_mode) as trace, self._observe_invocation(model, thread_id) as invocation:
+                faq_match = await self._amatch_faq(query)
+                if faq_match is not None:
+                    invocation["path"] = "faq"
+                    result = await self._arecord_turn(agent, config, self._faq_turn(query, faq_match), trace)
+                    answer, thread_id, tool_calls, debug_info = self._build_result(result, thread_id, trace)
+                    return answer, thread_id, self._mark_faq_hit(tool_calls, faq_match), debug_info
+                
+                first_turn = await self._ais_first_turn(config, new_thread, debug_mode)
+                cached, vector = await self._alookup_response(model, query, first_turn)
+                if cached is not None:
+                    invocation["path"] = "response_cache"
+                    await self._arecord_turn(agent, config, self._answer_turn(query, cached.answer))
+                    return cached.answer, thread_id, copy.deepcopy(cached.tool_calls), None
+                
+                async def run_agent():
+                    start_time = time.time()
+                    agent_input = await self._aroute_input(query)
+                    with self._speculate(agent_input, query):
+                        result = await agent.ainvoke(agent_input, config=config)
+                    response = self._build_result(result, thread_id, trace)
+                    self._store_response(model, query, vector, response, start_time)
+                    return response
+                
+                if not first_turn or self._agent_flights is None:
+                    return await run_agent()
+                
+                response = await self._agent_flights.do((model, normalize_query(query)), run_agent)
+                if response[1] != thread_id:
+                    invocation["path"] = "coalesced"
+                    # Answered by a concurrent identical first message; record it in this thread.
+                    await self._arecord_turn(agent, config, self._answer_turn(query, response[0]))
+                    return response[0], thread_id, copy.deepcopy(response[2]), None
+                return response
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error invoking agent: {str(e)}")
+            raise self._wrap_error(e) from e
+
+    async def _astream_agent(self, agent: Any, config: dict, query: str) -> AsyncIterator[tuple[str, dict]]:
+        """Pre-route the message, then run the agent as a stream of token and tool events."""
+        agent_input = await self._aroute_input(query)
+        for message in agent_input["messages"]:
+            if isinstance(message, AIMessage):
+                for tc in message.tool_calls:
+                    yield "tool_start", {"id": tc["id"], "name": tc["name"], "args": tc["args"]}
+            elif isinstance(message, ToolMessage):
+                yield "tool_end", {"id": message.tool_call_id, "name": message.name, "status": "success"}
+        
+        with self._speculate(agent_input, query):
+            async for event in self._astream_updates(agent, config, agent_input):
+                yield event
+
+    @staticmethod
+    async def _astream_updates(agent: Any, config: dict, agent_input: dict) -> AsyncIterator[tuple[str, dict]]:
+        """Translate the agent stream into token and tool events."""
+        async for mode, chunk in agent.astream(
+            agent_input,
+            config=config,
+            stream_mode=["messages", "updates"]
+        ):
+            if mode == "messages":
+                message, metadata = chunk
+                if metadata.get("langgraph_node") != "model" or getattr(message, "tool_call_chunks", None):
+                    continue
+                content = message.content if isinstance(message.content, str) else ""
+                if content:
+                    yield "token", {"content": content}
+                continue
             
-            tool_calls = self.message_parser.extract_tool_calls(
-                result,
-                messages_before,
-                tool_schema_getter=self.tool_manager.get_tool_schema
-            )
+            for node, update in chunk.items():
+                if not isinstance(update, dict):
+                    continue
+                for message in update.get("messages", []):
+                    if node == "model":
+                        for tc in getattr(message, "tool_calls", None) or []:
+                            yield "tool_start", {"id": tc.get("id"), "name": tc.get("name"), "args": tc.get("args", {})}
+                    elif node == "tools":
+                        yield "tool_end", {
+                            "id": getattr(message, "tool_call_id", None),
+                            "name": getattr(message, "name", None),
+                            "status": getattr(message, "status", "success")
+                        }
+
+    async def _astream_faq_turn(self, agent: Any, config: dict, query: str, faq_match: FAQMatch, trace: Optional[DebugService]) -> AsyncIterator[tuple[str, dict]]:
+        """Emit a fast-path turn with the same events an agent run would produce."""
+        messages = self._faq_turn(query, faq_match)
+        tool_call = messages[1].tool_calls[0]
+        yield "tool_start", {"id": tool_call["id"], "name": tool_call["name"], "args": tool_call["args"]}
+        await self._arecord_turn(agent, config, messages, trace)
+        yield "tool_end", {"id": tool_call["id"], "name": tool_call["name"], "status": "success"}
+        yield "token", {"content": faq_match.answer}
+
+    async def astream(self, query: str, thread_id: Optional[str] = None, debug_mode: bool = False, model: Optional[str] = None) -> AsyncIterator[tuple[str, dict]]:
+        """Stream the agent run as (event, payload) pairs.
+        
+        Emits ``token`` for answer tokens, ``tool_start``/``tool_end`` around each
+        tool execution and a final ``done`` carrying the same answer, thread_id,
+        tool calls and debug info that ``invoke`` returns.
+        """
+        try:
+            agent = self._get_agent(model)
+            model = model or DEFAULT_MODEL
             
-            debug_info = self.debug_service.get_debug_info() if debug_mode else None
-            return answer, thread_id, tool_calls, debug_info
+            new_thread = not thread_id
+            thread_id = self._get_or_create_thread_id(thread_id)
+            config = {"configurable": {"thread_id": thread_id}}
+            with debug_trace(debug_mode) as trace, self._observe_invocation(model, thread_id) as invocation:
+                cached = vector = None
+                faq_match = await self._amatch_faq(query)
+                if faq_match is None:
+                    first_turn = await self._ais_first_turn(config, new_thread, debug_mode)
+                    cached, vector = await self._alookup_response(model, query, first_turn)
+                
+                if cached is not None:
+                    invocation["path"] = "response_cache"
+                    await self._arecord_turn(agent, config, self._answer_turn(query, cached.answer))
+                    yield "token", {"content": cached.answer}
+                    yield "done", {
+                        "answer": cached.answer,
+                        "thread_id": thread_id,
+                        "tool_calls": copy.deepcopy(cached.tool_calls),
+                        "debug_info": None
+                    }
+                    return
+                
+                start_time = time.time()
+                if faq_match is not None:
+                    invocation["path"] = "faq"
+                    events = self._astream_faq_turn(agent, config, query, faq_match, trace)
+                else:
+                    events = self._astream_agent(agent, config, query)
+                async for event in events:
+                    yield event
+                
+                result = (await agent.aget_state(config)).values
+                answer, thread_id, tool_calls, debug_info = self._build_result(result, thread_id, trace)
+                self._store_response(model, query, vector, (answer, thread_id, tool_calls, debug_info), start_time)
+                if faq_match is not None:
+                    self._mark_faq_hit(tool_calls, faq_match)
+                yield "done", {
+                    "answer": answer,
+                    "thread_id": thread_id,
+                    "tool_calls": tool_calls,
+                    "debug_info": debug_info
+                }
+        except ValidationError:
+            raise
         except Exception as e:
-            logger.error(f"Error invoking agent: {str(e)}")
-            raise LLMServiceError(f"Failed to process query: {str(e)}") from e
+            logger.error(f"Error streaming agent: {str(e)}")
+            raise self._wrap_error(e) from e
+
+    def collect_metrics(self):
+        """Set the Prometheus gauges from sizes that are O(1) to read.
+        
+        Unlike ``get_stats`` this never queries the checkpointer store, so it is
+        cheap enough for every scrape.
+        """
+        PROCESS_RESIDENT_MEMORY.set(rss_bytes())
+        KNOWLEDGE_BASE_DOCUMENTS.set(self.vector_store.index.ntotal)
+        CACHE_ENTRIES.set(len(self.embeddings), cache="embeddings")
+        CACHE_ENTRIES.set(len(self.agent_pool), cache="agent_pool")
+        if self.response_cache is not None:
+            CACHE_ENTRIES.set(len(self.response_cache), cache="response")
+        if self._agent_flights is not None:
+            COALESCING_IN_FLIGHT.set(len(self._agent_flights), operation="agent")
+        threads = self.checkpointer.thread_count()
+        if threads is not None:
+            CHECKPOINTER_THREADS.set(threads)
+        self.tool_manager.collect_metrics()
+
+    def get_stats(self) -> dict:
+        """Get runtime gauges of the service."""
+        return self._stats(self.checkpointer.get_stats())
+
+    async def aget_stats(self) -> dict:
+        """Async version of ``get_stats``; a SQLite checkpointer is queried off the event loop."""
+        return self._stats(await self.checkpointer.aget_stats())
+
+    def _stats(self, checkpointer_stats: dict) -> dict:
+        return {
+            "checkpointer": checkpointer_stats,
+            "agent_pool": self.agent_pool.get_stats(),
+            "embeddings": self.embeddings.get_stats(),
+            "response_cache": self.response_cache.get_stats() if self.response_cache is not None else None,
+            "tools": self.tool_manager.get_stats(),
+            "agent_coalescing": self._agent_flights.get_stats() if self._agent_flights is not None else None,
+            "tool_router": self.tool_router.get_stats() if self.tool_router is not None else None,
+            "process": {"pid": os.getpid(), "rss_bytes": rss_bytes()},
+            "knowledge_base": {
+                "documents": self.vector_store.index.ntotal,
+                "lexical_documents": len(self.lexical_index) if self.lexical_index is not None else None,
+                "faq_questions": len(self.faq_index) if self.faq_index is not None else None,
+                **self.knowledge_reloader.get_stats()
+            }
+        }
@@ -47,6 +47,17 @@ class MessageParser:
         
         return str(result)
     
+    @staticmethod
+    def find_turn_start(result: Any) -> int:
+        """Get the index of the last user message, i.e. where the current turn starts."""
+        if not isinstance(result, dict) or not result.get("messages"):
+            return 0
+        messages = result["messages"]
+        for i in range(len(messages) - 1, -1, -1):
+            if MessageParser._get_attr(messages[i], "type") in ("human", "user"):
+                return i
+        return 0
+    
     @staticmethod
     def _deduplicate_sentences(content: str) -> str:
         """Remove duplicate sentences from content."""
@@ -0,0 +1,23 @@
+"""Agent middleware timing and tracing every chat model call."""
+from typing import Any, Awaitable, Callable
+
+from langchain.agents.middleware import AgentMiddleware
+
+from app.core.metrics import LLM_CALL_DURATION, timed
+from app.core.tracing import start_span
+
+
+class ModelCallMetrics(AgentMiddleware):
+    """Records the latency and outcome of each model call of the agent as a metric and a trace span."""
+
+    def __init__(self, model: str):
+        super().__init__()
+        self.model = model
+
+    def wrap_model_call(self, request: Any, handler: Callable[[Any], Any]) -> Any:
+        with start_span("llm.call", model=self.model), timed(LLM_CALL_DURATION, outcome_label=True, model=self.model):
+            return handler(request)
+
+    async def awrap_model_call(self, request: Any, handler: Callable[[Any], Awaitable[Any]]) -> Any:
+        with start_span("llm.call", model=self.model), timed(LLM_CALL_DURATION, outcome_label=True, model=self.model):
+            return await handler(request)
@@ -0,0 +1,142 @@
+"""Semantic cache of first-turn agent responses."""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.cache import LRUCache
+from app.core.metrics import CACHE_LOOKUPS, RESPONSE_CACHE_SAVED_SECONDS
+from app.core.text import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Answers depending on the current time must never be replayed.
+UNCACHEABLE_TOOLS = {"get_current_datetime"}
+
+
+@dataclass
+class CachedResponse:
+    """Agent response stored for a first-turn message."""
+    model: str
+    vector: np.ndarray
+    answer: str
+    tool_calls: list[dict]
+    latency_ms: float
+
+
+class SemanticResponseCache:
+    """TTL/LRU-bounded cache of answers to conversation-opening messages.
+
+    Entries are keyed on model and normalized message. A lookup that misses the
+    exact key compares the message embedding with the cached entries of the
+    same model and returns the closest one at or above ``threshold``.
+    ``invalidate`` drops every entry when the knowledge base is swapped.
+    """
+
+    def __init__(self, embeddings: Embeddings, threshold: float = 0.95, max_size: int = 512, ttl_seconds: Optional[float] = 3600):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self._entries: LRUCache[CachedResponse] = LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_latency_ms = 0.0
+        self.invalidations = 0
+        self._invalidated_at = 0.0
+
+    @staticmethod
+    def _normalize(vector: list[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _nearest(self, model: str, vector: np.ndarray) -> Optional[tuple[str, str]]:
+        candidates = [(key, entry) for key, entry in self._entries.items() if entry.model == model]
+        if not candidates:
+            return None
+        scores = np.stack([entry.vector for _, entry in candidates]) @ vector
+        best = int(np.argmax(scores))
+        return candidates[best][0] if scores[best] >= self.threshold else None
+
+    def _count(self, entry: Optional[CachedResponse]) -> Optional[CachedResponse]:
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.saved_latency_ms += entry.latency_ms
+        CACHE_LOOKUPS.inc(cache="response", result="miss" if entry is None else "hit")
+        if entry is not None:
+            RESPONSE_CACHE_SAVED_SECONDS.inc(entry.latency_ms / 1000)
+        return entry
+
+    def _find(self, model: str, vector: np.ndarray) -> Optional[CachedResponse]:
+        key = self._nearest(model, vector)
+        return self._entries.get(key) if key is not None else None
+
+    def lookup(self, model: str, message: str) -> tuple[Optional[CachedResponse], Optional[np.ndarray]]:
+        """Find a cached response; also returns the message embedding for ``store``."""
+        entry = self._entries.get((model, normalize_query(message)))
+        if entry is not None:
+            return self._count(entry), entry.vector
+        vector = self._normalize(self.embeddings.embed_query(message))
+        return self._count(self._find(model, vector)), vector
+
+    async def alookup(self, model: str, message: str) -> tuple[Optional[CachedResponse], Optional[np.ndarray]]:
+        """Async version of ``lookup``."""
+        entry = self._entries.get((model, normalize_query(message)))
+        if entry is not None:
+            return self._count(entry), entry.vector
+        vector = self._normalize(await self.embeddings.aembed_query(message))
+        return self._count(self._find(model, vector)), vector
+
+    def store(
+        self,
+        model: str,
+        message: str,
+        vector: np.ndarray,
+        answer: str,
+        tool_calls: list[dict],
+        latency_ms: float,
+        started_at: Optional[float] = None
+    ):
+        """Cache a successful first-turn response unless it used time-dependent tools.
+
+        Responses whose run started (``started_at``, epoch seconds) before the
+        last ``invalidate`` may have used the replaced knowledge and are dropped.
+        """
+        if not answer or any(tc.get("name") in UNCACHEABLE_TOOLS for tc in tool_calls):
+            return
+        if started_at is not None and started_at < self._invalidated_at:
+            return
+        self._entries.set(
+            (model, normalize_query(message)),
+            CachedResponse(model=model, vector=vector, answer=answer, tool_calls=tool_calls, latency_ms=latency_ms)
+        )
+
+    def invalidate(self):
+        """Drop all cached responses, e.g. after a knowledge base reload."""
+        with self._lock:
+            self._invalidated_at = time.time()
+            self.invalidations += 1
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> dict:
+        """Get size, hit rate and the agent latency saved by hits."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self._entries.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_latency_ms": self.saved_latency_ms,
+            "invalidations": self.invalidations
+        }
@@ -0,0 +1,68 @@
+"""Speculative retrieval started alongside the first model call."""
+import asyncio
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Awaitable, Iterator, Optional
+
+from app.core.text import normalize_query
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _tokens(text: str) -> set[str]:
+    return set(_TOKEN.findall(normalize_query(text)))
+
+
+@dataclass
+class SpeculativeRetrieval:
+    """Retrieval for the raw user message, running while the model decides."""
+    query: str
+    task: asyncio.Task
+    used: bool = False
+
+    def matches(self, query: str, min_overlap: float) -> bool:
+        """Check whether the model's retrieval query is covered by the speculated one.
+
+        Models usually pass the user message or a keyword subset of it, so the
+        share of the model query's words contained in the message is compared.
+        """
+        requested = _tokens(query)
+        if not requested:
+            return False
+        return len(requested & _tokens(self.query)) / len(requested) >= min_overlap
+
+
+_current_speculation: ContextVar[Optional[SpeculativeRetrieval]] = ContextVar("speculative_retrieval", default=None)
+
+
+def get_speculation() -> Optional[SpeculativeRetrieval]:
+    """Get the speculative retrieval of the current request, if any."""
+    return _current_speculation.get()
+
+
+def _retrieve_exception(task: asyncio.Task):
+    if not task.cancelled():
+        task.exception()
+
+
+@contextmanager
+def speculate(query: str, retrieval: Awaitable[str]) -> Iterator[SpeculativeRetrieval]:
+    """Start ``retrieval`` in the background and bind it to the current request.
+
+    An unused retrieval is cancelled when the block exits.
+    """
+    speculation = SpeculativeRetrieval(query=query, task=asyncio.ensure_future(retrieval))
+    speculation.task.add_done_callback(_retrieve_exception)
+    token = _current_speculation.set(speculation)
+    try:
+        yield speculation
+    finally:
+        try:
+            _current_speculation.reset(token)
+        except ValueError:
+            # Streaming generators may be closed from another context.
+            _current_speculation.set(None)
+        if not speculation.used:
+            speculation.task.cancel()
@@ -1,30 +1,177 @@
+import asyncio
+import inspect
 import json
 import logging
-import os
+import threading
 import time
 from datetime import datetime
+from contextlib import AbstractContextManager
 from functools import wraps
 from typing import Optional, Any, Callable
 
-from langchain.tools import tool
+from langchain_core.tools import StructuredTool
 from langchain_community.vectorstores import FAISS
-from tavily import TavilyClient
+from tavily import TavilyClient, AsyncTavilyClient, UsageLimitExceededError
 
+from app.core.cache import LRUCache
 from app.core.constants import RETRIEVAL_K, WEB_SEARCH_MAX_RESULTS, WEB_SEARCH_CONTENT_MAX_LENGTH
-from app.core.exceptions import ToolError, VectorStoreError
+from app.core.exceptions import ToolError, UpstreamRateLimitError, VectorStoreError
+from app.core.metrics import (
+    CACHE_ENTRIES,
+    CACHE_LOOKUPS,
+    COALESCING_IN_FLIGHT,
+    RETRIEVAL_DURATION,
+    SPECULATIVE_RETRIEVALS,
+    TOOL_EXECUTIONS,
+    TOOL_EXECUTION_DURATION,
+    WEB_SEARCH_REQUEST_DURATION,
+    timed
+)
+from app.core.settings import get_settings
+from app.core.singleflight import SingleFlight
+from app.core.text import normalize_query
+from app.core.tracing import start_span
+from app.services.debug_service import get_debug_trace
+from app.services.hybrid_retriever import HybridRetriever
+from app.services.lexical_index import BM25Index
+from app.services.speculation import SpeculativeRetrieval, get_speculation, speculate
 
 logger = logging.getLogger(__name__)
 
 
+def create_tracked_impl(impl_func: Callable, tool_name: str, param_names: Optional[list[str]] = None) -> Callable:
+    """Wrap a tool implementation so each execution is counted, timed, traced and reported to the debug trace."""
+    def collect_args(args: tuple, kwargs: dict) -> dict:
+        tool_args = kwargs.copy() if kwargs else {}
+        if args:
+            if param_names:
+                for i, arg in enumerate(args):
+                    if i < len(param_names):
+                        tool_args[param_names[i]] = arg if isinstance(arg, (dict, list, int, float, bool)) or arg is None else str(arg)
+                    else:
+                        tool_args[f'_arg{i}'] = str(arg) if not isinstance(arg, (dict, list)) else arg
+            else:
+                for i, arg in enumerate(args):
+                    tool_args[f'_arg{i}'] = str(arg) if not isinstance(arg, (dict, list)) else arg
+        return tool_args
+    
+    def track(args: tuple, kwargs: dict, result: Any, error: Optional[str], start_time: float):
+        execution_time = time.time() - start_time
+        TOOL_EXECUTIONS.inc(tool=tool_name, outcome="error" if error is not None else "success")
+        TOOL_EXECUTION_DURATION.observe(execution_time, tool=tool_name)
+        debug_service = get_debug_trace()
+        if debug_service is None:
+            return
+        debug_service.track_tool_execution(
+            tool_name=tool_name,
+            args=collect_args(args, kwargs),
+            result=str(result) if result is not None else "",
+            execution_time_ms=execution_time * 1000,
+            error=error
+        )
+    
+    if inspect.iscoroutinefunction(impl_func):
+        @wraps(impl_func)
+        async def tracked_async_impl(*args, **kwargs):
+            start_time = time.time()
+            error = None
+            result = None
+            try:
+                with start_span(f"tool.{tool_name}"):
+                    result = await impl_func(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = str(e)
+                logger.error(f"Tool {tool_name} error: {e}")
+                raise
+            finally:
+                track(args, kwargs, result, error, start_time)
+        
+        return tracked_async_impl
+    
+    @wraps(impl_func)
+    def tracked_impl(*args, **kwargs):
+        start_time = time.time()
+        error = None
+        result = None
+        try:
+            with start_span(f"tool.{tool_name}"):
+                result = impl_func(*args, **kwargs)
+            return result
+        except Exception as e:
+            error = str(e)
+            logger.error(f"Tool {tool_name} error: {e}")
+            raise
+        finally:
+            track(args, kwargs, result, error, start_time)
+    
+    return tracked_impl
+
+
 class ToolManager:
     """Manages LangChain tools creation."""
 
-    def __init__(self):
-        self._vector_store: Optional[FAISS] = None
+    def __init__(
+        self,
+        tavily_client_factory: Optional[Callable[[], TavilyClient]] = None,
+        async_tavily_client_factory: Optional[Callable[[], AsyncTavilyClient]] = None
+    ):
+        settings = get_settings()
+        self._retriever: Optional[HybridRetriever] = None
+        self._retriever_generation = 0
+        self._retrieval_mode = settings.retrieval_mode
+        self._rrf_k = settings.retrieval_rrf_k
+        self._lexical_decisive_ratio = settings.retrieval_lexical_decisive_ratio
+        self._lexical_min_score = settings.retrieval_lexical_min_score
+        self.retrieval_paths: dict[str, int] = {}
+        self._tavily_api_key = settings.tavily_api_key
+        self._web_search_timeout = settings.web_search_timeout_seconds
+        self._web_search_cache: LRUCache[str] = LRUCache(
+            max_size=settings.web_search_cache_size,
+            ttl_seconds=settings.web_search_cache_ttl_seconds
+        )
+        self._tavily_client_factory = tavily_client_factory or (lambda: TavilyClient(api_key=self._tavily_api_key))
+        self._async_tavily_client_factory = async_tavily_client_factory or (
+            lambda: AsyncTavilyClient(api_key=self._tavily_api_key)
+        )
+        self._web_search_enabled = bool(self._tavily_api_key or tavily_client_factory or async_tavily_client_factory)
+        self._tavily_client: Optional[TavilyClient] = None
+        self._async_tavily_clients: dict[asyncio.AbstractEventLoop, AsyncTavilyClient] = {}
+        self._client_lock = threading.Lock()
+        self._speculation_min_overlap = settings.speculative_retrieval_min_overlap
+        self.speculation = {"started": 0, "hits": 0, "misses": 0}
+        self._retrieval_flights: Optional[SingleFlight[tuple]] = None
+        self._web_search_flights: Optional[SingleFlight[str]] = None
+        if settings.coalescing_enabled:
+            self._retrieval_flights = SingleFlight(timeout_seconds=settings.coalescing_timeout_seconds, name="retrieval")
+            self._web_search_flights = SingleFlight(timeout_seconds=settings.coalescing_timeout_seconds, name="web_search")
+        self._tracked_impls = {
+            "retriever_tool": (
+                create_tracked_impl(self._retriever_impl, "retriever_tool", ["query"]),
+                create_tracked_impl(self._aretrieve, "retriever_tool", ["query"])
+            ),
+            "get_current_datetime": (create_tracked_impl(self._datetime_impl, "get_current_datetime", []), None),
+            "web_search_tool": (
+                create_tracked_impl(self._web_search_impl, "web_search_tool", ["query"]),
+                create_tracked_impl(self._aweb_search_impl, "web_search_tool", ["query"])
+            )
+        }
+
+    def set_vector_store(self, vector_store: FAISS, lexical_index: Optional[BM25Index] = None):
+        """Set (or atomically swap) the vector store and lexical index for retrieval tools."""
+        self._retriever_generation += 1
+        self._retriever = HybridRetriever(
+            vector_store,
+            lexical_index,
+            mode=self._retrieval_mode,
+            rrf_k=self._rrf_k,
+            decisive_ratio=self._lexical_decisive_ratio,
+            min_score=self._lexical_min_score,
+            generation=self._retriever_generation
+        )
 
-    def set_vector_store(self, vector_store: FAISS):
-        """Set the vector store for retrieval tools."""
-        self._vector_store = vector_store
+    def _count_path(self, path: str):
+        self.retrieval_paths[path] = self.retrieval_paths.get(path, 0) + 1
 
     @staticmethod
     def _extract_answer(content: str) -> str:
@@ -35,49 +182,228 @@ class ToolManager:
         except Exception:
             return str(content).strip()
 
-    def _retriever_impl(self, query: str) -> str:
-        """Implementation: Retrieve information from portfolio knowledge base."""
-        if self._vector_store is None:
+    def _retriever_impl(self, query: str, category: Optional[str] = None) -> str:
+        """Implementation: Retrieve information from portfolio knowledge base, optionally within one FAQ category."""
+        # Read the reference once so a concurrent hot swap cannot split one retrieval.
+        retriever = self._retriever
+        if retriever is None:
             raise VectorStoreError("Vector store not initialized.")
         try:
-            docs = self._vector_store.similarity_search(query, k=RETRIEVAL_K)
-            answers = [self._extract_answer(doc.page_content) for doc in docs]
-            return "\n\n".join(answers) if answers else ""
+            start_time = time.perf_counter()
+            with start_span("retrieval.search", category=category) as span:
+                docs, path = retriever.search(query, k=RETRIEVAL_K, category=category)
+                if span is not None:
+                    span.set_attribute("path", path)
+            RETRIEVAL_DURATION.observe(time.perf_counter() - start_time, path=path)
+            self._count_path(path)
+            return self._format_documents(docs)
         except Exception as e:
             logger.error(f"Retrieval error: {e}")
             raise ToolError(f"Error retrieving information: {e}") from e
 
+    async def _aretriever_impl(self, query: str, category: Optional[str] = None) -> str:
+        """Async implementation: Retrieve information from portfolio knowledge base."""
+        retriever = self._retriever
+        if retriever is None:
+            raise VectorStoreError("Vector store not initialized.")
+        try:
+            start_time = time.perf_counter()
+            with start_span("retrieval.search", category=category) as span:
+                docs, path = await self._coalesce(
+                    self._retrieval_flights,
+                    (retriever.generation, normalize_query(query), category),
+                    lambda: retriever.asearch(query, k=RETRIEVAL_K, category=category)
+                )
+                if span is not None:
+                    span.set_attribute("path", path)
+            RETRIEVAL_DURATION.observe(time.perf_counter() - start_time, path=path)
+            self._count_path(path)
+            return self._format_documents(docs)
+        except Exception as e:
+            logger.error(f"Retrieval error: {e}")
+            raise ToolError(f"Error retrieving information: {e}") from e
+
+    def speculative_retrieval(self, query: str) -> AbstractContextManager[SpeculativeRetrieval]:
+        """Start retrieving ``query`` now for a retriever_tool call the model may request."""
+        self.speculation["started"] += 1
+        SPECULATIVE_RETRIEVALS.inc(event="started")
+        return speculate(query, self._aretriever_impl(query))
+
+    async def _aretrieve(self, query: str) -> str:
+        """Retrieve for the agent, reusing this request's speculative retrieval if it matches."""
+        speculation = get_speculation()
+        if speculation is not None and not speculation.used:
+            if speculation.matches(query, self._speculation_min_overlap):
+                speculation.used = True
+                self.speculation["hits"] += 1
+                SPECULATIVE_RETRIEVALS.inc(event="hit")
+                return await speculation.task
+            self.speculation["misses"] += 1
+            SPECULATIVE_RETRIEVALS.inc(event="miss")
+        return await self._aretriever_impl(query)
+
+    def _format_documents(self, docs: list) -> str:
+        """Join the answers of retrieved documents."""
+        answers = [doc.metadata.get("answer") or self._extract_answer(doc.page_content) for doc in docs]
+        return "\n\n".join(answers) if answers else ""
+
+    def _get_tavily_client(self) -> TavilyClient:
+        """Get the shared Tavily client; its HTTP session pools connections."""
+        with self._client_lock:
+            if self._tavily_client is None:
+                self._tavily_client = self._tavily_client_factory()
+            return self._tavily_client
+
+    def _get_async_tavily_client(self) -> AsyncTavilyClient:
+        """Get the async Tavily client of the running event loop.
+
+        httpx connection pools are bound to the loop they were opened on, so one
+        client is kept per loop (in production there is a single one).
+        """
+        loop = asyncio.get_running_loop()
+        with self._client_lock:
+            client = self._async_tavily_clients.get(loop)
+            if client is None:
+                for closed_loop in [l for l in self._async_tavily_clients if l.is_closed()]:
+                    del self._async_tavily_clients[closed_loop]
+                client = self._async_tavily_clients[loop] = self._async_tavily_client_factory()
+            return client
+
+    def _cached_search(self, key: str) -> Optional[str]:
+        cached = self._web_search_cache.get(key)
+        CACHE_LOOKUPS.inc(cache="web_search", result="miss" if cached is None else "hit")
+        return cached
+
+    @staticmethod
+    async def _coalesce(flights: Optional[SingleFlight], key: Any, fn: Callable) -> Any:
+        """Share one in-flight call among identical concurrent requests, if enabled."""
+        if flights is None:
+            return await fn()
+        return await flights.do(key, fn)
+
+    async def _asearch(self, query: str, key: str) -> str:
+        """Query Tavily and cache the formatted result."""
+        with start_span("tavily.search"), timed(WEB_SEARCH_REQUEST_DURATION, outcome_label=True):
+            response = await self._get_async_tavily_client().search(
+                query=query,
+                max_results=WEB_SEARCH_MAX_RESULTS,
+                include_answer="advanced",
+                timeout=self._web_search_timeout
+            )
+        result = self._format_search_results(response)
+        self._web_search_cache.set(key, result)
+        return result
+
     def _web_search_impl(self, query: str) -> str:
         """Implementation: Search the web using Tavily API."""
         try:
-            api_key = os.getenv("TAVILY_API_KEY")
-            if not api_key:
+            if not self._web_search_enabled:
                 return "Web search unavailable. Configure TAVILY_API_KEY."
 
-            response = TavilyClient(api_key=api_key).search(query=query, max_results=WEB_SEARCH_MAX_RESULTS,include_answer="advanced")
-            results = response.get("results", [])
-            if not results:
-                return "No search results found."
-
-            formatted = []
-            links = []
-            for i, r in enumerate(results[:WEB_SEARCH_MAX_RESULTS], 1):
-                title = r.get("title", "No title")
-                content = r.get("content", "")
-                url = r.get("url", "")
-
-                content_preview = content[:WEB_SEARCH_CONTENT_MAX_LENGTH]
-                content_suffix = "..." if len(content) > WEB_SEARCH_CONTENT_MAX_LENGTH else ""
-                formatted.append(
-                    f"[{i}] {title}\n{content_preview}{content_suffix}\nSource: {url}"
+            key = normalize_query(query)
+            cached = self._cached_search(key)
+            if cached is not None:
+                return cached
+
+            with start_span("tavily.search"), timed(WEB_SEARCH_REQUEST_DURATION, outcome_label=True):
+                response = self._get_tavily_client().search(
+                    query=query,
+                    max_results=WEB_SEARCH_MAX_RESULTS,
+                    include_answer="advanced",
+                    timeout=self._web_search_timeout
                 )
-                links.append({"title": title, "url": url})
+            result = self._format_search_results(response)
+            self._web_search_cache.set(key, result)
+            return result
+        except UsageLimitExceededError as e:
+            logger.warning(f"Tavily rate limit: {e}")
+            raise UpstreamRateLimitError(f"Tavily usage limit reached: {e}") from e
+        except Exception as e:
+            logger.error(f"Web search error: {e}")
+            raise ToolError(f"Error performing web search: {e}") from e
+
+    async def _aweb_search_impl(self, query: str) -> str:
+        """Async implementation: Search the web using Tavily API."""
+        try:
+            if not self._web_search_enabled:
+                return "Web search unavailable. Configure TAVILY_API_KEY."
 
-            return "\n\n".join(formatted) + f"\n\n__LINKS__:{json.dumps({'links': links})}"
+            key = normalize_query(query)
+            cached = self._cached_search(key)
+            if cached is not None:
+                return cached
+
+            return await self._coalesce(self._web_search_flights, key, lambda: self._asearch(query, key))
+        except UsageLimitExceededError as e:
+            logger.warning(f"Tavily rate limit: {e}")
+            raise UpstreamRateLimitError(f"Tavily usage limit reached: {e}") from e
         except Exception as e:
             logger.error(f"Web search error: {e}")
             raise ToolError(f"Error performing web search: {e}") from e
 
+    @staticmethod
+    def _format_search_results(response: dict) -> str:
+        """Format Tavily results with a trailing __LINKS__ marker."""
+        results = response.get("results", [])
+        if not results:
+            return "No search results found."
+
+        formatted = []
+        links = []
+        for i, r in enumerate(results[:WEB_SEARCH_MAX_RESULTS], 1):
+            title = r.get("title", "No title")
+            content = r.get("content", "")
+            url = r.get("url", "")
+
+            content_preview = content[:WEB_SEARCH_CONTENT_MAX_LENGTH]
+            content_suffix = "..." if len(content) > WEB_SEARCH_CONTENT_MAX_LENGTH else ""
+            formatted.append(
+                f"[{i}] {title}\n{content_preview}{content_suffix}\nSource: {url}"
+            )
+            links.append({"title": title, "url": url})
+
+        return "\n\n".join(formatted) + f"\n\n__LINKS__:{json.dumps({'links': links})}"
+
+    @staticmethod
+    def _datetime_impl() -> str:
+        """Implementation for get_current_datetime."""
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def run_tool(self, name: str, args: dict) -> str:
+        """Run a tool outside the agent loop, tracked like the agent's own tool calls."""
+        if name not in self._tracked_impls:
+            raise ToolError(f"Tool '{name}' not found")
+        impl, _ = self._tracked_impls[name]
+        return impl(**args)
+
+    async def arun_tool(self, name: str, args: dict) -> str:
+        """Async version of ``run_tool``."""
+        if name not in self._tracked_impls:
+            raise ToolError(f"Tool '{name}' not found")
+        impl, aimpl = self._tracked_impls[name]
+        return await aimpl(**args) if aimpl is not None else impl(**args)
+
+    def get_stats(self) -> dict:
+        """Get retrieval path, tool cache and coalescing counters."""
+        return {
+            "retrieval_paths": dict(self.retrieval_paths),
+            "web_search_cache": self._web_search_cache.get_stats(),
+            "speculative_retrieval": {
+                **self.speculation,
+                "wasted": self.speculation["started"] - self.speculation["hits"],
+                "hit_rate": self.speculation["hits"] / self.speculation["started"] if self.speculation["started"] else 0.0
+            },
+            "retrieval_coalescing": self._retrieval_flights.get_stats() if self._retrieval_flights is not None else None,
+            "web_search_coalescing": self._web_search_flights.get_stats() if self._web_search_flights is not None else None
+        }
+
+    def collect_metrics(self):
+        """Set the tool gauges from sizes that are O(1) to read."""
+        CACHE_ENTRIES.set(len(self._web_search_cache), cache="web_search")
+        for name, flights in (("retrieval", self._retrieval_flights), ("web_search", self._web_search_flights)):
+            if flights is not None:
+                COALESCING_IN_FLIGHT.set(len(flights), operation=name)
+
     def get_all_tools(self) -> list[dict]:
         """Get all available tools with their schemas."""
         tools_data = [
@@ -125,71 +451,37 @@ class ToolManager:
                 }
         return None
 
-    def create_langchain_tools(self, debug_mode: bool = False, debug_service: Optional[Any] = None) -> list[Any]:
-        """Create LangChain tools."""
-        def create_tracked_impl(impl_func: Callable, tool_name: str, param_names: Optional[list[str]] = None) -> Callable:
-            if not debug_mode or debug_service is None:
-                return impl_func
-            
-            @wraps(impl_func)
-            def tracked_impl(*args, **kwargs):
-                start_time = time.time()
-                error = None
-                result = None
-                
-                tool_args = kwargs.copy() if kwargs else {}
-                if args:
-                    if param_names:
-                        for i, arg in enumerate(args):
-                            if i < len(param_names):
-                                tool_args[param_names[i]] = arg if isinstance(arg, (dict, list, int, float, bool)) or arg is None else str(arg)
-                            else:
-                                tool_args[f'_arg{i}'] = str(arg) if not isinstance(arg, (dict, list)) else arg
-                    else:
-                        for i, arg in enumerate(args):
-                            tool_args[f'_arg{i}'] = str(arg) if not isinstance(arg, (dict, list)) else arg
-                
-                try:
-                    result = impl_func(*args, **kwargs)
-                    return result
-                except Exception as e:
-                    error = str(e)
-                    logger.error(f"Tool {tool_name} error: {e}")
-                    raise
-                finally:
-                    execution_time_ms = (time.time() - start_time) * 1000
-                    debug_service.track_tool_execution(
-                        tool_name=tool_name,
-                        args=tool_args,
-                        result=str(result) if result is not None else "",
-                        execution_time_ms=execution_time_ms,
-                        error=error
-                    )
-            
-            return tracked_impl
-
-        retriever_impl = create_tracked_impl(self._retriever_impl, "retriever_tool", ["query"])
-        
-        def datetime_impl() -> str:
-            """Implementation for get_current_datetime."""
-            return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        datetime_impl = create_tracked_impl(datetime_impl, "get_current_datetime", [])
+    def create_langchain_tools(self) -> list[Any]:
+        """Create LangChain tools with sync and async implementations.
         
-        web_search_impl = create_tracked_impl(self._web_search_impl, "web_search_tool", ["query"])
+        Every tool execution is counted and timed in the metrics; arguments and
+        results are only tracked when the current request has bound a debug
+        trace, so one set of tools serves all traffic.
+        """
+        retriever_impl, aretriever_impl = self._tracked_impls["retriever_tool"]
+        datetime_impl, _ = self._tracked_impls["get_current_datetime"]
+        web_search_impl, aweb_search_impl = self._tracked_impls["web_search_tool"]
 
-        @tool
         def retriever_tool(query: str) -> str:
             """Retrieve information from portfolio knowledge base about Herman Tsago. USE THIS TOOL EXCLUSIVELY for questions about Herman Tsago (projects, skills, experience, contact, portfolio). DO NOT use web_search_tool for Herman Tsago questions."""
             return retriever_impl(query)
 
-        @tool
+        async def aretriever_tool(query: str) -> str:
+            return await aretriever_impl(query)
+
         def get_current_datetime() -> str:
             """Get current date and time. Use this tool ONLY for questions about date/time."""
             return datetime_impl()
 
-        @tool
         def web_search_tool(query: str) -> str:
             """Search the web using Tavily API for general IT questions and technical topics. DO NOT use this tool for questions about Herman Tsago - use retriever_tool instead."""
             return web_search_impl(query)
 
-        return [retriever_tool, get_current_datetime, web_search_tool]
\ No newline at end of file
+        async def aweb_search_tool(query: str) -> str:
+            return await aweb_search_impl(query)
+
+        return [
+            StructuredTool.from_function(func=retriever_tool, coroutine=aretriever_tool),
+            StructuredTool.from_function(func=get_current_datetime),
+            StructuredTool.from_function(func=web_search_tool, coroutine=aweb_search_tool),
+        ]
@@ -0,0 +1,167 @@
+"""Pre-routing of user messages to a tool before the first model call."""
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from app.core.constants import ROUTER_WEB_SEED_QUESTIONS
+from app.core.metrics import TOOL_ROUTER_DECISIONS
+from app.core.text import normalize_query
+from app.services.faq_index import embed_texts
+
+logger = logging.getLogger(__name__)
+
+DATETIME_PATTERN = re.compile(
+    r"\b(uhrzeit|datum|wie spät|welcher tag|what time|what day|current date|today's date|quelle heure|quelle date)\b"
+)
+
+
+@dataclass
+class ToolRoute:
+    """Tool chosen for a message before the agent runs."""
+    tool: str
+    args: dict = field(default_factory=dict)
+    confidence: float = 1.0
+    reason: str = "keyword"
+
+
+class ToolRouter:
+    """Base router: never routes, so the agent selects tools itself.
+
+    Subclasses implement ``_route``/``_aroute``; ``route``/``aroute`` count the
+    decisions for ``get_stats``.
+    """
+
+    def __init__(self):
+        self.routed: dict[str, int] = {}
+        self.passed = 0
+
+    def _route(self, message: str) -> Optional[ToolRoute]:
+        return None
+
+    async def _aroute(self, message: str) -> Optional[ToolRoute]:
+        return self._route(message)
+
+    def _count(self, route: Optional[ToolRoute]) -> Optional[ToolRoute]:
+        if route is None:
+            self.passed += 1
+            TOOL_ROUTER_DECISIONS.inc(tool="agent", reason="passed")
+        else:
+            key = f"{route.tool}:{route.reason}"
+            self.routed[key] = self.routed.get(key, 0) + 1
+            TOOL_ROUTER_DECISIONS.inc(tool=route.tool, reason=route.reason)
+        return route
+
+    def route(self, message: str) -> Optional[ToolRoute]:
+        """Pick a tool for ``message`` or None to let the agent decide."""
+        return self._count(self._route(message))
+
+    async def aroute(self, message: str) -> Optional[ToolRoute]:
+        """Async version of ``route``."""
+        return self._count(await self._aroute(message))
+
+    def get_stats(self) -> dict:
+        """Get routing decisions by tool and reason."""
+        total = sum(self.routed.values()) + self.passed
+        return {
+            "routed": dict(self.routed),
+            "passed_to_agent": self.passed,
+            "route_rate": sum(self.routed.values()) / total if total else 0.0
+        }
+
+
+class HeuristicToolRouter(ToolRouter):
+    """Routes messages with keyword rules and a nearest-centroid classifier.
+
+    Keyword rules catch date/time questions and messages containing one of the
+    configured portfolio ``keywords`` (names of the owner and projects). Other
+    messages are embedded and compared with one centroid per FAQ category
+    (``retriever_tool``) and one of generic tech questions
+    (``web_search_tool``). A route is only taken if the best centroid reaches
+    ``min_similarity`` and beats the best centroid of the other tool by
+    ``margin``; otherwise (e.g. small talk) the agent decides as before.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        centroids: np.ndarray,
+        tools: list[str],
+        margin: float,
+        min_similarity: float = 0.0,
+        keywords: Optional[list[str]] = None
+    ):
+        super().__init__()
+        self.embeddings = embeddings
+        self.centroids = centroids
+        self.tools = tools
+        self.margin = margin
+        self.min_similarity = min_similarity
+        keywords = [normalize_query(keyword) for keyword in keywords or [] if keyword.strip()]
+        self.keyword_pattern = (
+            re.compile(r"\b(" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b") if keywords else None
+        )
+
+    @classmethod
+    def build(
+        cls,
+        docs: dict[str, Document],
+        embeddings: Embeddings,
+        margin: float,
+        min_similarity: float = 0.0,
+        keywords: Optional[list[str]] = None,
+        cache_path: Optional[str] = None
+    ) -> "HeuristicToolRouter":
+        """Build the classifier from FAQ questions and the built-in tech seed questions."""
+        by_category: dict[str, list[int]] = {}
+        ids, texts = [], []
+        for entry_id, doc in docs.items():
+            if doc.metadata.get("question"):
+                by_category.setdefault(f"retriever_tool:{doc.metadata.get('category') or ''}", []).append(len(texts))
+                ids.append(entry_id)
+                texts.append(doc.metadata["question"])
+        for question in ROUTER_WEB_SEED_QUESTIONS:
+            by_category.setdefault("web_search_tool:", []).append(len(texts))
+            ids.append(hashlib.sha256(question.encode("utf-8")).hexdigest())
+            texts.append(question)
+
+        vectors = embed_texts(ids, texts, embeddings, cache_path)
+        labels = list(by_category)
+        centroids = np.stack([vectors[by_category[label]].mean(axis=0) for label in labels])
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+        logger.info(f"Tool router built with {len(labels)} centroids")
+        return cls(embeddings, centroids, [label.split(":", 1)[0] for label in labels], margin, min_similarity, keywords)
+
+    def _keyword_route(self, message: str) -> Optional[ToolRoute]:
+        text = normalize_query(message)
+        if self.keyword_pattern is not None and self.keyword_pattern.search(text):
+            return ToolRoute(tool="retriever_tool", args={"query": message})
+        if DATETIME_PATTERN.search(text):
+            return ToolRoute(tool="get_current_datetime")
+        return None
+
+    def _classify(self, message: str, vector: list[float]) -> Optional[ToolRoute]:
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+        scores = self.centroids @ (query / norm)
+        best = int(np.argmax(scores))
+        if scores[best] < self.min_similarity:
+            return None
+        others = [score for score, tool in zip(scores, self.tools) if tool != self.tools[best]]
+        margin = float(scores[best] - max(others)) if others else float(scores[best])
+        if margin < self.margin:
+            return None
+        return ToolRoute(tool=self.tools[best], args={"query": message}, confidence=margin, reason="centroid")
+
+    def _route(self, message: str) -> Optional[ToolRoute]:
+        return self._keyword_route(message) or self._classify(message, self.embeddings.embed_query(message))
+
+    async def _aroute(self, message: str) -> Optional[ToolRoute]:
+        return self._keyword_route(message) or self._classify(message, await self.embeddings.aembed_query(message))
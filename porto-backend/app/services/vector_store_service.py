@@ -1,55 +1,296 @@
 """Vector store initialization and management."""
+import hashlib
+import json
 import logging
 import os
+import re
+from contextlib import contextmanager
+from typing import Optional
 
-from langchain_community.document_loaders import JSONLoader
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 
-from app.core.constants import INDEX_PATH, DATABASE_PATH
+from app.core.constants import (
+    INDEX_PATH,
+    DATABASE_PATH,
+    INDEX_MANIFEST_FILE,
+    INDEX_FORMAT_VERSION,
+    INDEX_FAISS_FILE,
+    INDEX_DOCSTORE_FILE,
+    RETRIEVAL_K
+)
 from app.core.exceptions import VectorStoreError
+from app.core.settings import get_settings
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.faiss_index import IndexSpec, apply_search_params, create_index, evaluate_index
+from app.services.lexical_index import BM25Index
 
 logger = logging.getLogger(__name__)
 
+LINK_PATTERN = re.compile(r"\]\((https?://[^)\s]+)\)|(https?://[^\s)\]]+)")
+
 
 class VectorStoreService:
-    """Service for managing vector store operations."""
-    
+    """Service for managing vector store operations.
+
+    The index folder carries a manifest with the knowledge base fingerprint, the
+    embedding model and the content hash of every FAQ entry (also used as the
+    FAISS document id). An unchanged knowledge base is loaded without parsing
+    the JSON; a changed one only re-embeds added or edited entries. Question,
+    answer, category and link of each entry are stored in the document
+    metadata, so retrieval never parses JSON.
+
+    Vectors are saved in the native FAISS format and documents in a JSON
+    docstore (no pickle). Serving indexes are memory-mapped read-only, so
+    worker processes share the vector pages instead of copying them.
+
+    The FAISS index type (flat, HNSW or IVF-PQ) comes from the
+    ``VECTOR_INDEX_*`` settings; its build parameters and a recall/latency
+    report of the last full build are recorded in the manifest.
+    """
+
+    @staticmethod
+    def create_embeddings() -> CachedEmbeddings:
+        """Create the OpenAI embeddings behind the query embedding cache."""
+        settings = get_settings()
+        return CachedEmbeddings(
+            OpenAIEmbeddings(),
+            max_size=settings.embedding_cache_size,
+            cache_dir=settings.embedding_cache_dir
+        )
+
+    @staticmethod
+    def _embedding_model(embeddings: Embeddings) -> str:
+        """Get the embedding model name recorded in the manifest."""
+        return getattr(embeddings, "model", None) or type(embeddings).__name__
+
+    @staticmethod
+    def file_fingerprint(path: str) -> str:
+        """Get the SHA-256 of a file without parsing it."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(65536), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
     @staticmethod
-    def initialize() -> FAISS:
+    def _payload(entry: dict) -> dict:
+        """Extract the retrieval-ready fields of an FAQ entry, stored in document metadata."""
+        answer = str(entry.get("answer", "")).strip()
+        link = LINK_PATTERN.search(answer)
+        return {
+            "question": str(entry.get("question", "")).strip(),
+            "answer": answer,
+            "category": entry.get("category"),
+            "url": next((group for group in link.groups() if group), None) if link else None
+        }
+
+    @staticmethod
+    def load_documents(path: str = DATABASE_PATH) -> dict[str, Document]:
+        """Parse the knowledge base into documents keyed by entry content hash."""
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f).get("portfolio-faq", [])
+        docs = {}
+        for entry in entries:
+            content = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+            entry_id = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            docs[entry_id] = Document(
+                page_content=content,
+                metadata={"source": os.path.abspath(path), **VectorStoreService._payload(entry)},
+                id=entry_id
+            )
+        return docs
+
+    @staticmethod
+    def _read_manifest(index_path: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(index_path, INDEX_MANIFEST_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable index manifest: {e}")
+            return None
+
+    @staticmethod
+    def _write_manifest(index_path: str, manifest: dict):
+        path = os.path.join(index_path, INDEX_MANIFEST_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    @contextmanager
+    def _build_lock(index_path: str):
+        """Serialize index builds across worker processes (no-op without fcntl)."""
+        os.makedirs(index_path, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(index_path, ".build.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _update_index(vector_store: FAISS, docs: dict[str, Document], indexed_ids: set[str]):
+        """Apply the entry delta to an existing index."""
+        removed = [entry_id for entry_id in indexed_ids if entry_id not in docs]
+        added = [entry_id for entry_id in docs if entry_id not in indexed_ids]
+        if removed:
+            vector_store.delete(removed)
+        if added:
+            vector_store.add_documents([docs[entry_id] for entry_id in added], ids=added)
+        logger.info(f"Updated vector store: {len(added)} entries embedded, {len(removed)} removed")
+
+    @staticmethod
+    def initialize(embeddings: Optional[Embeddings] = None) -> FAISS:
         """Initialize and return the vector store."""
         try:
-            loader = JSONLoader(
-                file_path=DATABASE_PATH, 
-                jq_schema='."portfolio-faq"[] | @json'
-            )
-            docs = loader.load()
-            embeddings = OpenAIEmbeddings()
-
-            index_faiss_path = os.path.join(INDEX_PATH, "index.faiss")
-            index_pkl_path = os.path.join(INDEX_PATH, "index.pkl")
-            
-            if os.path.exists(index_faiss_path) and os.path.exists(index_pkl_path):
-                logger.info(f"Loading existing vector store from {INDEX_PATH}")
-                try:
-                    return FAISS.load_local(
-                        embeddings=embeddings, 
-                        folder_path=INDEX_PATH, 
-                        allow_dangerous_deserialization=True
-                    )
-                except Exception as load_error:
-                    logger.warning(f"Failed to load existing vector store: {load_error}. Creating new one.")
-                    vector_store = FAISS.from_documents(docs, embeddings)
-                    vector_store.save_local(folder_path=INDEX_PATH)
-                    return vector_store
-            else:
-                logger.info("Creating new vector store")
-                if not os.path.exists(INDEX_PATH):
-                    os.makedirs(INDEX_PATH, exist_ok=True)
-                vector_store = FAISS.from_documents(docs, embeddings)
-                vector_store.save_local(folder_path=INDEX_PATH)
-                return vector_store
+            embeddings = embeddings if embeddings is not None else VectorStoreService.create_embeddings()
+            with VectorStoreService._build_lock(INDEX_PATH):
+                return VectorStoreService._load_or_build(embeddings)
         except Exception as e:
             logger.error(f"Error initializing vector store: {str(e)}")
             raise VectorStoreError(f"Failed to initialize vector store: {str(e)}") from e
 
+    @staticmethod
+    def build_lexical_index(vector_store: FAISS) -> BM25Index:
+        """Build the BM25 index over the documents stored in the vector store."""
+        docs = [vector_store.docstore.search(doc_id) for doc_id in vector_store.index_to_docstore_id.values()]
+        lexical_index = BM25Index([doc for doc in docs if isinstance(doc, Document)])
+        logger.info(f"Lexical index built with {len(lexical_index)} documents")
+        return lexical_index
+
+    @staticmethod
+    def _save_index(vector_store: FAISS, index_path: str):
+        """Write the index and docstore next to the live files and swap them in.
+
+        Replacing (never overwriting) the files keeps pages that other workers
+        memory-mapped from the previous version valid.
+        """
+        index_file = os.path.join(index_path, INDEX_FAISS_FILE)
+        docstore_file = os.path.join(index_path, INDEX_DOCSTORE_FILE)
+        ids = [vector_store.index_to_docstore_id[i] for i in range(vector_store.index.ntotal)]
+        documents = {}
+        for doc_id in ids:
+            doc = vector_store.docstore.search(doc_id)
+            documents[doc_id] = {"page_content": doc.page_content, "metadata": doc.metadata}
+
+        faiss.write_index(vector_store.index, f"{index_file}.tmp")
+        with open(f"{docstore_file}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "documents": documents}, f, ensure_ascii=False)
+        os.replace(f"{index_file}.tmp", index_file)
+        os.replace(f"{docstore_file}.tmp", docstore_file)
+
+        # Drop the pickled docstore of the previous index format.
+        legacy_file = os.path.join(index_path, "index.pkl")
+        if os.path.exists(legacy_file):
+            os.remove(legacy_file)
+
+    @staticmethod
+    def _load_index(embeddings: Embeddings, index_path: str, spec: IndexSpec, mmap: bool) -> Optional[FAISS]:
+        """Load a saved index, memory-mapping the vectors read-only if ``mmap`` is set.
+
+        A memory-mapped index must not be modified; load it with ``mmap=False``
+        to apply updates.
+        """
+        index_file = os.path.join(index_path, INDEX_FAISS_FILE)
+        docstore_file = os.path.join(index_path, INDEX_DOCSTORE_FILE)
+        if not (os.path.exists(index_file) and os.path.exists(docstore_file)):
+            return None
+        try:
+            with open(docstore_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            index = faiss.read_index(index_file, faiss.IO_FLAG_MMAP_IFC if mmap else 0)
+            apply_search_params(index, spec)
+            ids = data["ids"]
+            if len(ids) != index.ntotal:
+                raise VectorStoreError(f"Docstore has {len(ids)} entries, index has {index.ntotal}")
+            docstore = InMemoryDocstore({
+                doc_id: Document(id=doc_id, **data["documents"][doc_id]) for doc_id in ids
+            })
+            return FAISS(embeddings, index, docstore, dict(enumerate(ids)))
+        except Exception as load_error:
+            logger.warning(f"Failed to load existing vector store: {load_error}")
+            return None
+
+    @staticmethod
+    def _build_index(docs: dict[str, Document], embeddings: Embeddings, spec: IndexSpec) -> tuple[FAISS, IndexSpec, dict]:
+        """Embed all documents into a new index of the configured type and evaluate it."""
+        texts = [doc.page_content for doc in docs.values()]
+        vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+        index, effective_spec = create_index(spec, vectors)
+        vector_store = FAISS(embeddings, index, InMemoryDocstore(), {})
+        vector_store.add_embeddings(
+            zip(texts, vectors.tolist()),
+            metadatas=[doc.metadata for doc in docs.values()],
+            ids=list(docs)
+        )
+        report = {"factory": effective_spec.factory, **evaluate_index(index, vectors, RETRIEVAL_K)}
+        logger.info(f"Built {effective_spec.factory} vector index: {report}")
+        return vector_store, effective_spec, report
+
+    @staticmethod
+    def _load_or_build(embeddings: Embeddings) -> FAISS:
+        """Load the saved index, updating or rebuilding it if the knowledge base changed."""
+        embedding_model = VectorStoreService._embedding_model(embeddings)
+        fingerprint = VectorStoreService.file_fingerprint(DATABASE_PATH)
+        manifest = VectorStoreService._read_manifest(INDEX_PATH)
+        spec = IndexSpec.from_settings(get_settings())
+
+        reusable = (
+            manifest is not None
+            and manifest.get("format_version") == INDEX_FORMAT_VERSION
+            and manifest.get("embedding_model") == embedding_model
+            and manifest.get("index", {}).get("requested") == spec.build_params()
+        )
+        if reusable and manifest.get("source_sha256") == fingerprint:
+            vector_store = VectorStoreService._load_index(embeddings, INDEX_PATH, spec, mmap=True)
+            if vector_store is not None:
+                logger.info(f"Loaded existing vector store from {INDEX_PATH} (knowledge base unchanged)")
+                return vector_store
+
+        docs = VectorStoreService.load_documents(DATABASE_PATH)
+        vector_store = VectorStoreService._load_index(embeddings, INDEX_PATH, spec, mmap=False) if reusable else None
+        if vector_store is not None:
+            logger.info(f"Knowledge base changed, updating vector store in {INDEX_PATH}")
+            try:
+                VectorStoreService._update_index(vector_store, docs, set(manifest.get("entries", [])))
+                index_info = manifest["index"]
+            except RuntimeError as e:
+                # HNSW indexes do not support removing vectors.
+                logger.info(f"Index cannot be updated in place ({str(e).splitlines()[0]}), rebuilding")
+                vector_store = None
+        if vector_store is None:
+            logger.info(f"Creating new vector store ({spec.factory})")
+            vector_store, effective_spec, report = VectorStoreService._build_index(docs, embeddings, spec)
+            index_info = {
+                "requested": spec.build_params(),
+                "effective": effective_spec.build_params(),
+                "factory": effective_spec.factory,
+                "build_report": report
+            }
+
+        VectorStoreService._save_index(vector_store, INDEX_PATH)
+        VectorStoreService._write_manifest(INDEX_PATH, {
+            "format_version": INDEX_FORMAT_VERSION,
+            "embedding_model": embedding_model,
+            "source_sha256": fingerprint,
+            "index": index_info,
+            "entries": list(docs)
+        })
+        return VectorStoreService._load_index(embeddings, INDEX_PATH, spec, mmap=True) or vector_store
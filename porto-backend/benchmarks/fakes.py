@@ -0,0 +1,132 @@
+"""Deterministic offline stand-ins for Groq, OpenAI embeddings and Tavily."""
+import asyncio
+import hashlib
+import re
+import time
+import uuid
+from typing import Any, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+_TOKEN = re.compile(r"\w+")
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that calls the scripted tools for every user turn, then answers.
+
+    ``tool_script`` lists the tools called one after another (each with the
+    user message as query); once all results are in, a fixed answer is
+    returned. ``latency_seconds`` is slept on every call.
+    """
+    model_name: str = "scripted"
+    latency_seconds: float = 0.0
+    tool_script: list[str] = ["retriever_tool"]
+    answer: str = "Herman Tsago ist AI Engineer. [Mehr erfahren](https://www.herman-tsago.tech)"
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        return self
+
+    def _reply(self, messages: list[BaseMessage]) -> AIMessage:
+        turn_start = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+        question = messages[turn_start].content if messages else ""
+        calls = sum(isinstance(m, ToolMessage) for m in messages[turn_start:])
+        if calls < len(self.tool_script):
+            tool = self.tool_script[calls]
+            args = {} if tool == "get_current_datetime" else {"query": question}
+            return AIMessage(content="", tool_calls=[{"name": tool, "args": args, "id": f"call_{uuid.uuid4().hex[:12]}"}])
+        return AIMessage(content=self.answer)
+
+    def _generate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+
+class HashEmbeddings(Embeddings):
+    """Bag-of-words feature hashing: texts sharing words get similar vectors."""
+
+    def __init__(self, size: int = 256, latency_seconds: float = 0.0):
+        self.size = size
+        self.latency_seconds = latency_seconds
+        self.model = f"hash-embeddings-{size}"
+
+    def _vector(self, text: str) -> list[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for token in _TOKEN.findall(text.casefold()):
+            h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[h % self.size] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            vector[0] = norm = 1.0
+        return (vector / norm).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return self._vector(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return self._vector(text)
+
+
+def _search_response(query: str, max_results: int) -> dict:
+    return {
+        "answer": f"Offline answer for: {query}",
+        "results": [
+            {
+                "title": f"Result {i + 1} for {query}",
+                "url": f"https://example.com/{i + 1}",
+                "content": f"Offline search result {i + 1} about {query}. " * 5
+            }
+            for i in range(max_results)
+        ]
+    }
+
+
+class StubTavilyClient:
+    """Local stand-in for ``TavilyClient.search``."""
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+
+    def search(self, query: str, max_results: int = 5, **kwargs: Any) -> dict:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return _search_response(query, max_results)
+
+
+class AsyncStubTavilyClient:
+    """Local stand-in for ``AsyncTavilyClient.search``."""
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+
+    async def search(self, query: str, max_results: int = 5, **kwargs: Any) -> dict:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return _search_response(query, max_results)
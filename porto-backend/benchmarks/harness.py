@@ -0,0 +1,159 @@
+"""Shared pieces of the benchmarks: offline service wiring, request driver and statistics."""
+import asyncio
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterator, Optional
+
+import httpx
+
+from app.core.process import rss_bytes
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KNOWLEDGE_BASE = os.path.join(BACKEND_ROOT, "data", "portfolio-knowledge.json")
+CHAT_PATH = "/api/v1/chat"
+
+
+@dataclass
+class TurnResult:
+    """Outcome of one chat request."""
+    session: int
+    turn: int
+    latency_ms: float
+    status: int
+    started_at: float
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile, 0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered), max(1, math.ceil(q / 100 * len(ordered)))) - 1]
+
+
+def latency_summary(latencies_ms: list[float]) -> dict:
+    """Get p50/p95/p99, mean and max of latencies in milliseconds."""
+    return {
+        "p50_ms": round(percentile(latencies_ms, 50), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "p99_ms": round(percentile(latencies_ms, 99), 2),
+        "mean_ms": round(sum(latencies_ms) / len(latencies_ms), 2) if latencies_ms else 0.0,
+        "max_ms": round(max(latencies_ms), 2) if latencies_ms else 0.0
+    }
+
+
+def load_questions(path: str = KNOWLEDGE_BASE) -> list[str]:
+    """Get the FAQ questions of the knowledge base."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [entry["question"] for entry in json.load(f).get("portfolio-faq", []) if entry.get("question")]
+
+
+@contextmanager
+def offline_workdir() -> Iterator[str]:
+    """Run in a temporary directory holding a copy of the knowledge base.
+
+    The vector index is built there, so benchmarks never touch ``portfolio-db``.
+    """
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="porto-bench-") as workdir:
+        os.makedirs(os.path.join(workdir, "data"))
+        shutil.copy(KNOWLEDGE_BASE, os.path.join(workdir, "data", "portfolio-knowledge.json"))
+        os.chdir(workdir)
+        try:
+            yield workdir
+        finally:
+            os.chdir(previous)
+
+
+def install_offline_service(
+    llm_latency_seconds: float = 0.0,
+    embedding_latency_seconds: float = 0.0,
+    search_latency_seconds: float = 0.0,
+    tool_script: Optional[list[str]] = None
+):
+    """Create an LLMService backed by the offline fakes and install it in the DI container.
+
+    All load comes from one in-process client, so the per-IP and per-thread
+    rate limits are switched off; the global in-flight cap stays in place.
+    """
+    from app.core.admission import get_admission_controller
+    from app.core.dependencies import DIContainer, set_container
+    from app.core.settings import get_settings
+    from app.services.embedding_cache import CachedEmbeddings
+    from app.services.llm_service import LLMService
+    from app.services.tool_manager import ToolManager
+    from benchmarks.fakes import AsyncStubTavilyClient, HashEmbeddings, ScriptedChatModel, StubTavilyClient
+
+    settings = get_settings()
+    script = ["retriever_tool"] if tool_script is None else tool_script
+    service = LLMService(
+        chat_model_factory=lambda model: ScriptedChatModel(
+            model_name=model,
+            latency_seconds=llm_latency_seconds,
+            tool_script=script
+        ),
+        embeddings=CachedEmbeddings(
+            HashEmbeddings(latency_seconds=embedding_latency_seconds),
+            max_size=settings.embedding_cache_size
+        ),
+        tool_manager=ToolManager(
+            tavily_client_factory=lambda: StubTavilyClient(search_latency_seconds),
+            async_tavily_client_factory=lambda: AsyncStubTavilyClient(search_latency_seconds)
+        )
+    )
+    set_container(DIContainer(service))
+    admission = get_admission_controller()
+    admission.ip_limiter = admission.thread_limiter = None
+    return service
+
+
+async def run_sessions(
+    client: httpx.AsyncClient,
+    sessions: list[list[dict]],
+    concurrency: int,
+    think_time: Optional[Callable[[], Awaitable[None]]] = None
+) -> list[TurnResult]:
+    """Send each session's requests in order on one thread, running up to ``concurrency`` sessions at once.
+
+    The ``thread_id`` returned by the first turn is reused for the following
+    turns; a failed turn ends its session.
+    """
+    results: list[TurnResult] = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in enumerate(sessions):
+        queue.put_nowait(item)
+
+    async def worker():
+        while not queue.empty():
+            session_index, turns = queue.get_nowait()
+            thread_id = None
+            for turn_index, payload in enumerate(turns):
+                if turn_index and think_time is not None:
+                    await think_time()
+                started_at = time.time()
+                start = time.perf_counter()
+                try:
+                    response = await client.post(CHAT_PATH, json={**payload, "thread_id": thread_id})
+                    status = response.status_code
+                    if status == 200:
+                        thread_id = response.json().get("thread_id")
+                except httpx.HTTPError:
+                    status = 0
+                results.append(TurnResult(
+                    session=session_index,
+                    turn=turn_index,
+                    latency_ms=(time.perf_counter() - start) * 1000,
+                    status=status,
+                    started_at=started_at
+                ))
+                if status != 200:
+                    break
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return results
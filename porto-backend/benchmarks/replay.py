@@ -0,0 +1,222 @@
+"""Conversation replay load generator for the chat API.
+
+Replays multi-turn conversations against ``/api/v1/chat`` with ``thread_id``
+continuity, think time between turns and abandoned sessions. It reports a
+latency histogram per turn index and the backend's RSS over time (sampled from
+the ``porto_process_resident_memory_bytes`` gauge of ``/metrics``). Example::
+
+    python -m benchmarks.replay --url http://localhost:8090 --sessions 300 --concurrency 50
+
+Without ``--url`` the backend runs in-process on the offline fakes.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from typing import Optional
+
+import httpx
+
+from app.core.constants import ROUTER_WEB_SEED_QUESTIONS
+from benchmarks.harness import TurnResult, install_offline_service, latency_summary, load_questions, offline_workdir, run_sessions
+
+METRICS_PATH = "/metrics"
+RSS_METRIC = "porto_process_resident_memory_bytes"
+HISTOGRAM_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+DATE_QUESTIONS = ["Welches Datum ist heute?", "Wie spät ist es gerade?", "What day is it today?"]
+
+
+def seed_corpus(sessions: int, max_turns: int, mix: tuple[float, float, float], rng: random.Random) -> list[list[str]]:
+    """Build conversations from knowledge base, tech and date questions.
+
+    ``mix`` weights portfolio, tech and date questions; the first turn is
+    always a portfolio question.
+    """
+    pools = [load_questions(), ROUTER_WEB_SEED_QUESTIONS, DATE_QUESTIONS]
+    conversations = []
+    for _ in range(sessions):
+        turns = [rng.choice(pools[0])]
+        for _ in range(rng.randint(1, max_turns) - 1):
+            turns.append(rng.choice(rng.choices(pools, weights=mix)[0]))
+        conversations.append(turns)
+    return conversations
+
+
+def load_corpus(path: str) -> list[list[str]]:
+    """Read conversations from JSONL, one JSON list of messages (or ``{"turns": [...]}``) per line."""
+    conversations = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                data = json.loads(line)
+                conversations.append(data["turns"] if isinstance(data, dict) else data)
+    return conversations
+
+
+def abandon(conversations: list[list[str]], rate: float, rng: random.Random) -> list[list[str]]:
+    """Cut each conversation after every turn with probability ``rate``."""
+    sessions = []
+    for turns in conversations:
+        length = 1
+        while length < len(turns) and rng.random() >= rate:
+            length += 1
+        sessions.append(turns[:length])
+    return sessions
+
+
+def histogram(latencies_ms: list[float]) -> dict[str, int]:
+    """Count latencies per bucket upper bound in milliseconds."""
+    counts = {f"le_{bound}": 0 for bound in HISTOGRAM_BUCKETS_MS}
+    counts["gt_last"] = 0
+    for latency in latencies_ms:
+        bound = next((b for b in HISTOGRAM_BUCKETS_MS if latency <= b), None)
+        counts[f"le_{bound}" if bound is not None else "gt_last"] += 1
+    return counts
+
+
+def per_turn_report(results: list[TurnResult]) -> list[dict]:
+    """Summarize latencies by turn index."""
+    report = []
+    for turn in sorted({r.turn for r in results}):
+        turn_results = [r for r in results if r.turn == turn]
+        latencies = [r.latency_ms for r in turn_results if r.status == 200]
+        report.append({
+            "turn": turn + 1,
+            "requests": len(turn_results),
+            "errors": len(turn_results) - len(latencies),
+            **latency_summary(latencies),
+            "histogram": histogram(latencies)
+        })
+    return report
+
+
+def read_gauge(exposition: str, name: str) -> float:
+    """Get an unlabelled sample from Prometheus text output, 0 if it is missing."""
+    for line in exposition.splitlines():
+        if line.startswith(f"{name} "):
+            return float(line.split()[1])
+    return 0.0
+
+
+async def sample_memory(client: httpx.AsyncClient, interval: float, samples: list[dict], start: float):
+    """Append the backend's RSS from the metrics endpoint every ``interval`` seconds.
+
+    ``/metrics`` only reads counters and O(1) gauges, so sampling does not
+    perturb the latencies being measured.
+    """
+    while True:
+        try:
+            response = await client.get(METRICS_PATH)
+            samples.append({
+                "elapsed_s": round(time.perf_counter() - start, 2),
+                "rss_mb": round(read_gauge(response.text, RSS_METRIC) / 2 ** 20, 1)
+            })
+        except (httpx.HTTPError, ValueError) as e:
+            logging.getLogger(__name__).warning(f"Memory sample failed: {e}")
+        await asyncio.sleep(interval)
+
+
+async def replay(client: httpx.AsyncClient, conversations: list[list[str]], args: argparse.Namespace, rng: random.Random) -> dict:
+    """Replay the conversations and collect per-turn latency and memory samples."""
+    sessions = [[{"message": message, "model": args.model} for message in turns] for turns in conversations]
+
+    async def think_time():
+        if args.think_time_ms:
+            await asyncio.sleep(rng.expovariate(1000 / args.think_time_ms))
+
+    samples: list[dict] = []
+    start = time.perf_counter()
+    sampler = asyncio.create_task(sample_memory(client, args.memory_interval, samples, start))
+    try:
+        results = await run_sessions(client, sessions, args.concurrency, think_time=think_time)
+    finally:
+        sampler.cancel()
+    duration = time.perf_counter() - start
+
+    return {
+        "sessions": len(sessions),
+        "requests": len(results),
+        "errors": sum(r.status != 200 for r in results),
+        "duration_s": round(duration, 2),
+        "throughput_rps": round(len(results) / duration, 2) if duration else 0.0,
+        **latency_summary([r.latency_ms for r in results if r.status == 200]),
+        "per_turn": per_turn_report(results),
+        "memory": samples
+    }
+
+
+def print_report(report: dict):
+    """Print the per-turn latency table and the memory range."""
+    print(
+        f"{report['sessions']} sessions, {report['requests']} requests, {report['errors']} errors, "
+        f"{report['throughput_rps']} req/s, p50 {report['p50_ms']} ms, p95 {report['p95_ms']} ms"
+    )
+    print(f"{'turn':>4}  {'requests':>8}  {'errors':>6}  {'p50_ms':>8}  {'p95_ms':>8}  {'p99_ms':>8}")
+    for row in report["per_turn"]:
+        print(
+            f"{row['turn']:>4}  {row['requests']:>8}  {row['errors']:>6}  "
+            f"{row['p50_ms']:>8}  {row['p95_ms']:>8}  {row['p99_ms']:>8}"
+        )
+    rss = [sample["rss_mb"] for sample in report["memory"] if sample["rss_mb"]]
+    if rss:
+        print(f"backend RSS: start {rss[0]} MB, peak {max(rss)} MB, end {rss[-1]} MB ({len(rss)} samples)")
+
+
+async def main(args: argparse.Namespace) -> int:
+    rng = random.Random(args.seed)
+    conversations = load_corpus(args.corpus) if args.corpus else seed_corpus(
+        args.sessions, args.max_turns, (args.portfolio_weight, args.tech_weight, args.date_weight), rng
+    )
+    conversations = abandon(conversations, args.abandon_rate, rng)
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        from app.main import app
+        install_offline_service(llm_latency_seconds=args.offline_llm_latency_ms / 1000)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay", timeout=args.timeout)
+
+    async with client:
+        report = await replay(client, conversations, args, rng)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), **report}, f, indent=2)
+    return 1 if report["errors"] else 0
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay multi-turn conversations against the chat API")
+    parser.add_argument("--url", help="Backend base URL; runs in-process on offline fakes if omitted")
+    parser.add_argument("--corpus", help="JSONL conversations; seeded from the knowledge base if omitted")
+    parser.add_argument("--sessions", type=int, default=200, help="Seeded conversations")
+    parser.add_argument("--max-turns", type=int, default=8, help="Maximum turns of a seeded conversation")
+    parser.add_argument("--portfolio-weight", type=float, default=0.6)
+    parser.add_argument("--tech-weight", type=float, default=0.25)
+    parser.add_argument("--date-weight", type=float, default=0.15)
+    parser.add_argument("--abandon-rate", type=float, default=0.2, help="Chance a session ends after each turn")
+    parser.add_argument("--concurrency", type=int, default=20, help="Conversations running at once")
+    parser.add_argument("--think-time-ms", type=float, default=2000, help="Mean (exponential) pause between turns")
+    parser.add_argument("--model", help="Model for all requests (backend default if omitted)")
+    parser.add_argument("--timeout", type=float, default=120, help="Request timeout in seconds")
+    parser.add_argument("--memory-interval", type=float, default=1.0, help="Seconds between RSS samples")
+    parser.add_argument("--offline-llm-latency-ms", type=float, default=300, help="Fake model latency without --url")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    for name in ("corpus", "json"):
+        if getattr(arguments, name):
+            setattr(arguments, name, os.path.abspath(getattr(arguments, name)))
+    logging.disable(logging.INFO)
+    if arguments.url:
+        sys.exit(asyncio.run(main(arguments)))
+    with offline_workdir():
+        sys.exit(asyncio.run(main(arguments)))
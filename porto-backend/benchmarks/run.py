@@ -0,0 +1,132 @@
+"""Offline benchmark of the chat API.
+
+Drives ``/api/v1/chat`` in-process with fake chat models, hash embeddings and
+a stub Tavily client, so only backend overhead is measured and no network is
+needed. Example::
+
+    python -m benchmarks.run --requests 200 --concurrency 8 --max-p95-ms 250
+"""
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+
+import httpx
+
+from app.core.process import rss_bytes
+from benchmarks.harness import install_offline_service, latency_summary, load_questions, offline_workdir, run_sessions
+
+SCENARIOS = ("single_turn", "long_thread", "model_switching", "debug_mode")
+
+
+def build_sessions(scenario: str, requests: int, turns: int, questions: list[str], models: list[str]) -> list[list[dict]]:
+    """Build the request sessions of a scenario, about ``requests`` requests in total."""
+    question = itertools.cycle(questions)
+    if scenario == "single_turn":
+        return [[{"message": next(question)}] for _ in range(requests)]
+    if scenario == "debug_mode":
+        return [[{"message": next(question), "debug_mode": True}] for _ in range(requests)]
+    if scenario == "long_thread":
+        return [[{"message": next(question)} for _ in range(turns)] for _ in range(max(1, requests // turns))]
+    if scenario == "model_switching":
+        model = itertools.cycle(models)
+        return [
+            [{"message": next(question), "model": next(model)} for _ in range(turns)]
+            for _ in range(max(1, requests // turns))
+        ]
+    raise ValueError(f"Unknown scenario '{scenario}'")
+
+
+async def run_scenario(app, scenario: str, args: argparse.Namespace, questions: list[str], models: list[str]) -> dict:
+    """Run one scenario and report latency, throughput and RSS growth."""
+    sessions = build_sessions(scenario, args.requests, args.turns, questions, models)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        gc.collect()
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        results = await run_sessions(client, sessions, args.concurrency)
+        duration = time.perf_counter() - start
+        gc.collect()
+        rss_after = rss_bytes()
+
+    latencies = [r.latency_ms for r in results if r.status == 200]
+    return {
+        "scenario": scenario,
+        "requests": len(results),
+        "errors": sum(r.status != 200 for r in results),
+        "concurrency": args.concurrency,
+        **latency_summary(latencies),
+        "throughput_rps": round(len(results) / duration, 2) if duration else 0.0,
+        "rss_before_mb": round(rss_before / 2 ** 20, 1),
+        "rss_after_mb": round(rss_after / 2 ** 20, 1),
+        "rss_growth_mb": round((rss_after - rss_before) / 2 ** 20, 1)
+    }
+
+
+def print_report(reports: list[dict]):
+    """Print the scenario reports as a table."""
+    columns = ["scenario", "requests", "errors", "p50_ms", "p95_ms", "p99_ms", "throughput_rps", "rss_growth_mb"]
+    widths = [max(len(c), *(len(str(r[c])) for r in reports)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for report in reports:
+        print("  ".join(str(report[c]).ljust(w) for c, w in zip(columns, widths)))
+
+
+async def main(args: argparse.Namespace) -> int:
+    from app.main import app
+    from app.core.settings import get_settings
+
+    service = install_offline_service(
+        llm_latency_seconds=args.llm_latency_ms / 1000,
+        embedding_latency_seconds=args.embedding_latency_ms / 1000,
+        search_latency_seconds=args.search_latency_ms / 1000,
+        tool_script=args.tool_script.split(",") if args.tool_script else []
+    )
+    questions = load_questions()
+    models = [m for m in get_settings().allowed_models_list if m != "*"] or ["scripted"]
+
+    # Warm up agents for every model so scenarios measure steady state.
+    for model in models:
+        await service.ainvoke(questions[0], model=model)
+
+    reports = [await run_scenario(app, scenario, args, questions, models) for scenario in args.scenarios]
+    print_report(reports)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "scenarios": reports}, f, indent=2)
+
+    failed = [r["scenario"] for r in reports if r["errors"] or (args.max_p95_ms and r["p95_ms"] > args.max_p95_ms)]
+    if failed:
+        print(f"Benchmark gate failed for: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline benchmark of the chat API")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Sessions running at once")
+    parser.add_argument("--turns", type=int, default=20, help="Turns per thread in multi-turn scenarios")
+    parser.add_argument("--llm-latency-ms", type=float, default=0, help="Latency of every fake model call")
+    parser.add_argument("--embedding-latency-ms", type=float, default=0, help="Latency of every fake embedding call")
+    parser.add_argument("--search-latency-ms", type=float, default=0, help="Latency of every stub web search")
+    parser.add_argument("--tool-script", default="retriever_tool", help="Comma-separated tools the fake model calls per turn")
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    parser.add_argument("--max-p95-ms", type=float, default=0, help="Exit with 1 if any scenario's p95 exceeds this")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    if arguments.json:
+        arguments.json = os.path.abspath(arguments.json)
+    with offline_workdir():
+        logging.disable(logging.INFO)
+        sys.exit(asyncio.run(main(arguments)))
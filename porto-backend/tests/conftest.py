@@ -0,0 +1,26 @@
+"""Shared fixtures: fresh settings and an offline LLMService per test."""
+import pytest
+
+from app.core.admission import get_admission_controller
+from app.core.settings import get_settings
+from benchmarks.harness import offline_workdir, install_offline_service
+
+
+@pytest.fixture
+def settings_env(monkeypatch):
+    """Set environment variables for the settings read by the next ``get_settings`` call."""
+    def apply(**values: str):
+        for name, value in values.items():
+            monkeypatch.setenv(name, value)
+        get_settings.cache_clear()
+        get_admission_controller.cache_clear()
+    yield apply
+    get_settings.cache_clear()
+    get_admission_controller.cache_clear()
+
+
+@pytest.fixture
+def offline_service(settings_env):
+    """Build an LLMService on the offline fakes in a temporary working directory."""
+    with offline_workdir():
+        yield install_offline_service
@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import AdmissionController
+from app.core.exceptions import AdmissionRejectedError
+
+
+def test_slot_handed_over_as_queue_wait_times_out_is_released(monkeypatch):
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=1.0)
+
+    async def release_then_time_out(waiter, timeout):
+        # The holder hands its slot to the waiter in the tick the timeout fires.
+        controller.release()
+        assert waiter.done()
+        raise asyncio.TimeoutError
+
+    async def scenario():
+        await controller.acquire("client")
+        with monkeypatch.context() as patch, pytest.raises(AdmissionRejectedError):
+            patch.setattr(asyncio, "wait_for", release_then_time_out)
+            await controller.acquire("client")
+
+        assert controller.in_flight == 0
+        assert controller.queued == 0
+        await asyncio.wait_for(controller.acquire("client"), timeout=0.1)
+        assert controller.in_flight == 1
+
+    asyncio.run(scenario())
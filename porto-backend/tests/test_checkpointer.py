@@ -0,0 +1,38 @@
+import asyncio
+
+from app.services.checkpointer import BoundedMemorySaver
+
+
+def scan(saver: BoundedMemorySaver) -> tuple[int, int]:
+    """Count checkpoints and serialized bytes the slow way."""
+    checkpoints = sum(len(ns) for thread in saver.storage.values() for ns in thread.values())
+    bytes_held = sum(
+        len(checkpoint[1]) + len(metadata[1])
+        for thread in saver.storage.values()
+        for ns in thread.values()
+        for checkpoint, metadata, _ in ns.values()
+    )
+    bytes_held += sum(len(blob[1]) for blob in saver.blobs.values())
+    bytes_held += sum(len(write[2][1]) for writes in saver.writes.values() for write in writes.values())
+    return checkpoints, bytes_held
+
+
+def test_memory_stats_track_writes_pruning_and_eviction(offline_service, settings_env):
+    settings_env(CHECKPOINTER_MAX_THREADS="3")
+    service = offline_service()
+    saver = service.checkpointer
+
+    async def scenario():
+        thread_ids = []
+        for i in range(5):
+            _, thread_id, _, _ = await service.ainvoke(f"Frage {i} zu Herman")
+            thread_ids.append(thread_id)
+        await service.ainvoke("Noch eine Frage", thread_id=thread_ids[-1])
+
+    asyncio.run(scenario())
+
+    stats = saver.get_stats()
+    assert stats["threads"] == 3
+    assert stats["evicted_threads"] == 2
+    assert (stats["checkpoints"], stats["bytes"]) == scan(saver)
+    assert stats["bytes"] > 0
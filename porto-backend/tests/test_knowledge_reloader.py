@@ -0,0 +1,23 @@
+import asyncio
+import os
+
+import httpx
+
+
+def test_reload_endpoint_reports_the_reloaded_process(offline_service, settings_env):
+    settings_env(ADMIN_API_KEY="secret")
+    offline_service()
+    from app.main import app
+
+    async def reload() -> dict:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/v1/admin/reload-knowledge?force=true", headers={"X-Admin-Key": "secret"})
+            assert response.status_code == 200
+            return response.json()
+
+    first, second = asyncio.run(reload()), asyncio.run(reload())
+
+    assert first["status"] == "reloaded"
+    assert (first["scope"], first["pid"]) == ("process", os.getpid())
+    assert second["generation"] == first["generation"] + 1
@@ -0,0 +1,38 @@
+import asyncio
+
+import numpy as np
+
+from app.services.response_cache import SemanticResponseCache
+from benchmarks.fakes import HashEmbeddings
+
+QUESTION = "Was macht Herman beruflich?"
+
+
+def test_knowledge_reload_invalidates_cached_answer(offline_service, settings_env):
+    settings_env(RESPONSE_CACHE_ENABLED="true")
+    service = offline_service()
+
+    async def scenario():
+        await service.ainvoke(QUESTION)
+        await service.ainvoke(QUESTION)
+        assert service.response_cache.hits == 1
+
+        await service.knowledge_reloader.reload(force=True)
+        assert len(service.response_cache) == 0
+
+        await service.ainvoke(QUESTION)
+        assert service.response_cache.hits == 1
+        assert service.response_cache.misses == 2
+
+    asyncio.run(scenario())
+
+
+def test_store_drops_response_started_before_invalidation():
+    cache = SemanticResponseCache(HashEmbeddings())
+    vector = np.ones(4, dtype=np.float32)
+    started_at = 0.0
+    cache.invalidate()
+
+    cache.store("model", QUESTION, vector, "stale answer", [], 10.0, started_at=started_at)
+
+    assert len(cache) == 0
@@ -0,0 +1,20 @@
+import asyncio
+
+from app.core.metrics import TOOL_EXECUTIONS
+
+
+def executions(tool: str) -> float:
+    sample = f'{TOOL_EXECUTIONS.name}{{tool="{tool}",outcome="success"}} '
+    return next((float(line.split()[-1]) for line in TOOL_EXECUTIONS.render() if line.startswith(sample)), 0.0)
+
+
+def test_routed_tool_is_counted_and_debug_traced_once(offline_service, settings_env):
+    settings_env(TOOL_ROUTER_ENABLED="true")
+    service = offline_service(tool_script=[])
+    before = executions("retriever_tool")
+
+    _, _, tool_calls, debug_info = asyncio.run(service.ainvoke("Welche Projekte hat Herman Tsago gebaut?", debug_mode=True))
+
+    assert [tc["name"] for tc in tool_calls] == ["retriever_tool"]
+    assert executions("retriever_tool") == before + 1
+    assert [t["tool_name"] for t in debug_info["tool_executions"]] == ["retriever_tool"]